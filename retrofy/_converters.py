@@ -1,7 +1,25 @@
-import dataclasses
+import concurrent.futures
+import os
+import sys
+import types
+from typing import (
+    Collection,
+    Dict,
+    FrozenSet,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+import warnings
 
 import libcst as cst
+import libcst.matchers as m
 
+from . import _fastpath
+from ._fastpath import TYPING_GENERIC_ALIASES
 from ._transformations import (
     collections_abc,
     dataclass,
@@ -12,55 +30,333 @@ from ._transformations import (
     typing_extensions,
     walrus,
 )
+from ._transformations._composite import CompositeTransformer
 from ._transformations.import_utils import EnhancedImportManager
 
+# libcst nodes are immutable, so these can be shared by every rewritten node.
+_TYPING_NAME = cst.Name("typing")
+_UNION_NAME = cst.Name("Union")
+_TYPING_UNION_ATTR = cst.Attribute(_TYPING_NAME, _UNION_NAME)
+_TYPING_GENERIC_ATTRS = {
+    name: cst.Attribute(_TYPING_NAME, cst.Name(alias))
+    for name, alias in TYPING_GENERIC_ALIASES.items()
+}
+
+_BUILTIN_GENERIC = m.OneOf(*(m.Name(name) for name in TYPING_GENERIC_ALIASES))
+_UNION_ANNOTATION = m.Annotation(annotation=m.BinaryOperation(operator=m.BitOr()))
+
+# The top-level modules whose imports the PEP 585 backports rewrite.
+_PEP585_MODULES = frozenset(
+    config.source_module.partition(".")[0] for config in pep585_imports._ALL_CONFIGS
+)
+
 
 class TypingTransformer(cst.CSTTransformer):
-    def __init__(self, scope):
-        self._scope = scope
+    def __init__(self, import_manager=None):
         self._require_typing = False
-        self.import_manager = EnhancedImportManager()
+        if import_manager is None:
+            import_manager = EnhancedImportManager()
+        self.import_manager = import_manager
 
     def leave_Annotation(
         self,
         node: cst.Annotation,
         updated_node: cst.Annotation,
     ) -> cst.Annotation:
-        if isinstance(updated_node.annotation, cst.BinaryOperation):
-            # TODO: Use a matcher here.
-            if isinstance(updated_node.annotation.operator, cst.BitOr):
-                # print('ANNO scope', self._scope[node.annotation])
-                self._require_typing = True
-                new_node = cst.Subscript(
-                    cst.Attribute(
-                        cst.Name("typing"),
-                        cst.Name("Union"),
-                    ),
-                    slice=(
-                        cst.SubscriptElement(
-                            updated_node.annotation.left,  # type: ignore
-                        ),
-                        cst.SubscriptElement(
-                            updated_node.annotation.right,  # type: ignore
-                        ),
-                    ),
-                )
-                return cst.Annotation(new_node)
+        if not m.matches(updated_node, _UNION_ANNOTATION):
+            return updated_node
+        self._require_typing = True
+        union = cst.ensure_type(updated_node.annotation, cst.BinaryOperation)
+        new_node = cst.Subscript(
+            _TYPING_UNION_ATTR,
+            slice=(
+                cst.SubscriptElement(union.left),  # type: ignore
+                cst.SubscriptElement(union.right),  # type: ignore
+            ),
+        )
+        return cst.Annotation(new_node)
+
+    def leave_Module(self, node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        if self._require_typing:
+            self.import_manager.require_direct_import("typing")
+            return self.import_manager.apply_direct_imports(updated_node)
+        return updated_node
+
+
+def _target_names(target: cst.BaseExpression) -> List[str]:
+    """The names bound by assigning to ``target``."""
+    if type(target) is cst.Name:
+        return [target.value]
+    if type(target) in (cst.Tuple, cst.List):
+        names = []
+        for element in target.elements:  # type: ignore[attr-defined]
+            names.extend(_target_names(element.value))
+        return names
+    if type(target) is cst.StarredElement:
+        return _target_names(target.value)  # type: ignore[attr-defined]
+    return []
+
+
+class _BindingCollector(cst.CSTVisitor):
+    """Collect the names bound directly in one scope (a module, function or
+    class body).
+
+    Nested functions and classes only contribute their own name. It errs on
+    the side of finding a binding: names bound in comprehensions and lambdas
+    are counted against the enclosing scope.
+    """
+
+    def __init__(self, scope: cst.CSTNode) -> None:
+        self.scope = scope
+        self.names: Set[str] = set()
+        super().__init__()
+
+    def _nested(self, node: Union[cst.FunctionDef, cst.ClassDef]) -> bool:
+        if node is self.scope:
+            return True
+        self.names.add(node.name.value)
+        return False
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        return self._nested(node)
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> bool:
+        return self._nested(node)
+
+    def visit_Param(self, node: cst.Param) -> None:
+        self.names.add(node.name.value)
+
+    def visit_AssignTarget(self, node: cst.AssignTarget) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_AugAssign(self, node: cst.AugAssign) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_AnnAssign(self, node: cst.AnnAssign) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_For(self, node: cst.For) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_CompFor(self, node: cst.CompFor) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_NamedExpr(self, node: cst.NamedExpr) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_Del(self, node: cst.Del) -> None:
+        self.names.update(_target_names(node.target))
+
+    def visit_AsName(self, node: cst.AsName) -> None:
+        # ``import x as y``, ``with x as y`` and ``except X as y``.
+        self.names.update(_target_names(node.name))
+
+    def visit_ImportAlias(self, node: cst.ImportAlias) -> None:
+        if node.asname is None:
+            name = node.name
+            while type(name) is cst.Attribute:
+                name = name.value  # type: ignore[assignment]
+            self.names.add(name.value)  # type: ignore[union-attr]
+
+    def visit_Global(self, node: cst.Global) -> None:
+        self.names.update(item.name.value for item in node.names)
+
+    def visit_Nonlocal(self, node: cst.Nonlocal) -> None:
+        self.names.update(item.name.value for item in node.names)
+
+    def visit_MatchAs(self, node: cst.MatchAs) -> None:
+        if node.name is not None:
+            self.names.add(node.name.value)
+
+    def visit_MatchStar(self, node: cst.MatchStar) -> None:
+        if node.name is not None:
+            self.names.add(node.name.value)
+
+    def visit_MatchMapping(self, node: cst.MatchMapping) -> None:
+        if node.rest is not None:
+            self.names.add(node.rest.value)
+
+
+def _is_type_alias_annotation(annotation: cst.Annotation) -> bool:
+    """Whether ``annotation`` is ``TypeAlias`` (or ``<module>.TypeAlias``)."""
+    expr = annotation.annotation
+    if type(expr) is cst.Attribute:
+        expr = expr.attr  # type: ignore[attr-defined]
+    return type(expr) is cst.Name and expr.value == "TypeAlias"  # type: ignore
+
+
+def _is_typevar_call(node: cst.Call) -> bool:
+    func = node.func
+    if type(func) is cst.Attribute:
+        func = func.attr  # type: ignore[attr-defined]
+    return type(func) is cst.Name and func.value == "TypeVar"  # type: ignore
+
+
+class SequenceSubscriptTransformer(cst.CSTTransformer):
+    """Lower ``list[...]``, ``dict[...]`` and ``tuple[...]`` in type expressions.
+
+    Only annotations, type alias values (``type X = ...`` and
+    ``X: TypeAlias = ...``) and TypeVar bounds are rewritten: elsewhere the
+    subscript is a runtime value (``list[int]()``) or not a generic at all
+    (``list[0]`` where ``list`` is a local). For the same reason a subscript
+    which is called or indexed again is left alone, as is any use of a name
+    which is rebound in an enclosing scope.
+    """
+
+    def __init__(self, import_manager=None):
+        self._require_typing = False
+        if import_manager is None:
+            import_manager = EnhancedImportManager()
+        self.import_manager = import_manager
+        # Whether each enclosing context is a type expression (True) or a
+        # runtime value (False).
+        self._type_context: List[bool] = []
+        # Whether each enclosing call is to ``TypeVar``.
+        self._typevar_calls: List[bool] = []
+        self._scopes: List[cst.CSTNode] = []
+        # The names bound in each scope, by scope ID. Only computed once a
+        # candidate subscript is found in it.
+        self._bindings: Dict[int, FrozenSet[str]] = {}
+        # Subscripts which are called or indexed again, by node ID.
+        self._excluded: Set[int] = set()
+
+    def _is_rebound(self, name: str) -> bool:
+        for scope in self._scopes:
+            names = self._bindings.get(id(scope))
+            if names is None:
+                collector = _BindingCollector(scope)
+                scope.visit(collector)
+                names = self._bindings[id(scope)] = frozenset(collector.names)
+            if name in names:
+                return True
+        return False
+
+    def visit_Module(self, node: cst.Module) -> None:
+        self._scopes.append(node)
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        self._scopes.append(node)
+
+    def leave_FunctionDef(
+        self,
+        original_node: cst.FunctionDef,
+        updated_node: cst.FunctionDef,
+    ) -> cst.FunctionDef:
+        self._scopes.pop()
+        return updated_node
+
+    # A function's parameters and return annotation are evaluated in the
+    # enclosing scope, so its own bindings don't apply to them.
+    def visit_FunctionDef_params(self, node: cst.FunctionDef) -> None:
+        self._scopes.pop()
+
+    def leave_FunctionDef_params(self, node: cst.FunctionDef) -> None:
+        self._scopes.append(node)
+
+    def visit_FunctionDef_returns(self, node: cst.FunctionDef) -> None:
+        self._scopes.pop()
+
+    def leave_FunctionDef_returns(self, node: cst.FunctionDef) -> None:
+        self._scopes.append(node)
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> None:
+        self._scopes.append(node)
+
+    def leave_ClassDef(
+        self,
+        original_node: cst.ClassDef,
+        updated_node: cst.ClassDef,
+    ) -> cst.ClassDef:
+        self._scopes.pop()
+        return updated_node
+
+    def visit_Annotation(self, node: cst.Annotation) -> None:
+        self._type_context.append(True)
+
+    def leave_Annotation(
+        self,
+        original_node: cst.Annotation,
+        updated_node: cst.Annotation,
+    ) -> cst.Annotation:
+        self._type_context.pop()
+        return updated_node
+
+    def visit_AnnAssign_value(self, node: cst.AnnAssign) -> None:
+        self._type_context.append(_is_type_alias_annotation(node.annotation))
+
+    def leave_AnnAssign_value(self, node: cst.AnnAssign) -> None:
+        self._type_context.pop()
+
+    def visit_TypeAlias_value(self, node: cst.TypeAlias) -> None:
+        self._type_context.append(True)
 
+    def leave_TypeAlias_value(self, node: cst.TypeAlias) -> None:
+        self._type_context.pop()
+
+    def visit_TypeVar_bound(self, node: cst.TypeVar) -> None:
+        self._type_context.append(True)
+
+    def leave_TypeVar_bound(self, node: cst.TypeVar) -> None:
+        self._type_context.pop()
+
+    def visit_Call(self, node: cst.Call) -> None:
+        if type(node.func) is cst.Subscript:
+            self._excluded.add(id(node.func))
+        self._typevar_calls.append(_is_typevar_call(node))
+
+    def leave_Call(
+        self,
+        original_node: cst.Call,
+        updated_node: cst.Call,
+    ) -> cst.Call:
+        self._typevar_calls.pop()
         return updated_node
 
+    def visit_Arg_value(self, node: cst.Arg) -> None:
+        # Call arguments are runtime values, even within an annotation
+        # (``Annotated[int, f(list[int])]``), except for TypeVar's bound.
+        keyword = node.keyword
+        self._type_context.append(
+            self._typevar_calls[-1]
+            and keyword is not None
+            and keyword.value == "bound",
+        )
+
+    def leave_Arg_value(self, node: cst.Arg) -> None:
+        self._type_context.pop()
+
+    def visit_Subscript(self, node: cst.Subscript) -> None:
+        if type(node.value) is cst.Subscript:
+            self._excluded.add(id(node.value))
+
+    def leave_Subscript(
+        self,
+        node: cst.Subscript,
+        updated_node: cst.Subscript,
+    ) -> cst.Subscript:
+        context = self._type_context
+        if not context or not context[-1] or id(node) in self._excluded:
+            return updated_node
+        if not m.matches(updated_node.value, _BUILTIN_GENERIC):
+            return updated_node
+        name = updated_node.value.value  # type: ignore[attr-defined]
+        if self._is_rebound(name):
+            return updated_node
+        self._require_typing = True
+        return updated_node.with_changes(value=_TYPING_GENERIC_ATTRS[name])
+
     def leave_Module(self, node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        self._scopes.pop()
         if self._require_typing:
-            # Scan existing imports and add typing import if needed
-            self.import_manager.scan_imports(updated_node.body)
-            new_body = list(updated_node.body)
-            new_body = self.import_manager.ensure_direct_import(new_body, "typing")
-
-            return dataclasses.replace(updated_node, body=tuple(new_body))
+            self.import_manager.require_direct_import("typing")
+            return self.import_manager.apply_direct_imports(updated_node)
         return updated_node
 
 
-def convert_union(module: cst.Module) -> cst.Module:
+def convert_union(
+    module: cst.Module,
+    import_manager: EnhancedImportManager | None = None,
+) -> cst.Module:
     """
     Given typing such as `SomeClass | AnotherClass`, convert this to
     `typing.Union[SomeClass, AnotherClass]`, with the appropriate `typing`
@@ -71,34 +367,31 @@ def convert_union(module: cst.Module) -> cst.Module:
 
     """
 
-    wrapper = cst.metadata.MetadataWrapper(module)
-    metadata = wrapper.resolve(cst.metadata.ScopeProvider)
-
-    transformer = TypingTransformer(metadata)
-    return module.visit(transformer)
+    return module.visit(TypingTransformer(import_manager))
 
 
-def convert_sequence_subscript(module: cst.Module) -> cst.Module:
+def convert_sequence_subscript(
+    module: cst.Module,
+    import_manager: EnhancedImportManager | None = None,
+) -> cst.Module:
     """
-    Convert the built-in sequence types such as `list[int]` to the
-    `typing.List[int]` form.
+    Convert the built-in generics such as `list[int]` to the
+    `typing.List[int]` form, with the appropriate `typing` import included.
 
-    Currently only `list[int]` is supported.
+    `list`, `dict` and `tuple` are supported.
     """
-    # TODO: Do this correctly. Including adding the necessry typing import.
-    orig = module.code
-    new = orig.replace("list[str]", "typing.List[str]")
-    if new != orig:
-        return cst.parse_module(new)
-    return module
+    return module.visit(SequenceSubscriptTransformer(import_manager))
 
 
 def convert_walrus_operator(module: cst.Module) -> cst.Module:
     return module.visit(walrus.WalrusOperatorTransformer())
 
 
-def convert_type_alias(module: cst.Module) -> cst.Module:
-    return module.visit(type_alias.PEP695Transformer())
+def convert_type_alias(
+    module: cst.Module,
+    import_manager: EnhancedImportManager | None = None,
+) -> cst.Module:
+    return module.visit(type_alias.PEP695Transformer(import_manager))
 
 
 def convert_match_statement(module: cst.Module) -> cst.Module:
@@ -117,8 +410,11 @@ def convert_collections_abc(module: cst.Module) -> cst.Module:
     return collections_abc.convert(module)
 
 
-def convert_pep585_imports(module: cst.Module) -> cst.Module:
-    return pep585_imports.convert(module)
+def convert_pep585_imports(
+    module: cst.Module,
+    modules: Collection[str] | None = None,
+) -> cst.Module:
+    return pep585_imports.convert(module, modules)
 
 
 def convert_lazy_imports(code: str) -> str:
@@ -129,6 +425,16 @@ def convert(code: str) -> str:
     # PEP 810 ``lazy`` syntax is not parseable by libcst, so the
     # tokenize-based rewrite must run on the raw source first.
     code = convert_lazy_imports(code)
+    # One tokenize pass tells us which passes can possibly apply. Modules
+    # which need nothing, or only their built-in generics lowering, can skip
+    # libcst altogether.
+    features = _fastpath.sniff_features(code)
+    if features is None:
+        features = _fastpath.ALL_FEATURES
+    else:
+        converted = _fastpath.convert(code, features)
+        if converted is not None:
+            return converted
     try:
         mod = cst.parse_module(code)
     except cst.ParserSyntaxError as exc:
@@ -136,13 +442,120 @@ def convert(code: str) -> str:
         err.lineno = getattr(exc, "raw_line", None)
         err.offset = getattr(exc, "raw_column", None)
         raise err from exc
-    mod = convert_sequence_subscript(mod)
-    mod = convert_walrus_operator(mod)
-    mod = convert_type_alias(mod)
-    mod = convert_dataclass(mod)
-    mod = convert_typing_extensions(mod)
-    mod = convert_collections_abc(mod)
-    mod = convert_pep585_imports(mod)
-    mod = convert_match_statement(mod)
-    mod = convert_union(mod)
+    # One import manager for every pass that may need ``import typing``, so
+    # the import is only injected once.
+    import_manager = EnhancedImportManager()
+    # Passes which only look at one node at a time are fused into a single
+    # traversal. The backport passes analyse the whole module first so run on
+    # their own, and the match/union passes must see their output, so the
+    # original pass order is preserved. None of the passes introduce syntax
+    # that an earlier-skipped pass would have handled, so the features of the
+    # original source decide which passes run.
+    node_passes: list[cst.CSTTransformer] = []
+    if features.builtin_generic:
+        node_passes.append(SequenceSubscriptTransformer(import_manager))
+    if features.walrus:
+        node_passes.append(walrus.WalrusOperatorTransformer())
+    if features.type_params:
+        node_passes.append(type_alias.PEP695Transformer(import_manager))
+    if features.dataclass:
+        node_passes.append(dataclass.DataclassTransformer())
+    if node_passes:
+        mod = mod.visit(CompositeTransformer(node_passes))
+
+    if "typing" in features.backport_modules:
+        mod = convert_typing_extensions(mod)
+    if "collections" in features.backport_modules:
+        mod = convert_collections_abc(mod)
+    if features.backport_modules & _PEP585_MODULES:
+        mod = convert_pep585_imports(mod, features.backport_modules)
+
+    late_passes: list[cst.CSTTransformer] = []
+    if features.match:
+        late_passes.append(match_statement.MatchStatementTransformer())
+    if features.union:
+        late_passes.append(TypingTransformer(import_manager))
+    if late_passes:
+        mod = mod.visit(CompositeTransformer(late_passes))
     return mod.code
+
+
+# Below this many sources, starting worker processes (each of which has to
+# import libcst) costs more than it saves.
+_MIN_PARALLEL_SOURCES = 32
+
+
+def convert_all(codes: Sequence[str]) -> List[str]:
+    """Convert each of ``codes``, as :func:`convert` would.
+
+    Each source is converted independently, so larger batches are spread
+    over worker processes; libcst's parsing is CPU bound, so threads
+    wouldn't help. A ``SyntaxError`` in any source is raised here.
+    """
+    workers = min(os.cpu_count() or 1, len(codes) // _MIN_PARALLEL_SOURCES)
+    if workers <= 1:
+        return [convert(code) for code in codes]
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = list(
+                executor.map(_convert_recording_warnings, codes, chunksize=16),
+            )
+    except concurrent.futures.process.BrokenProcessPool:
+        # e.g. a sandbox which doesn't allow worker processes.
+        return [convert(code) for code in codes]
+    # The caller's warning filters (``-W error``, pytest's capture) don't
+    # reach the workers, so their warnings are re-emitted here, in order.
+    new_codes = []
+    for new_code, recorded in results:
+        for message, category, filename, lineno in recorded:
+            _reemit_warning(message, category, filename, lineno)
+        new_codes.append(new_code)
+    return new_codes
+
+
+def _reemit_warning(
+    message: str,
+    category: Type[Warning],
+    filename: str,
+    lineno: int,
+) -> None:
+    """Emit a worker's warning as if it had been raised in this process.
+
+    The emitting module's registry and name are used, as ``warnings.warn``
+    would, so that the ``default`` and ``once`` actions (and ``module``
+    filters) treat it the same as on the sequential path.
+    """
+    module = _module_for_file(filename)
+    if module is None:
+        module_globals = globals()
+    else:
+        module_globals = vars(module)
+    warnings.warn_explicit(
+        message,
+        category,
+        filename,
+        lineno,
+        module=module_globals["__name__"],
+        registry=module_globals.setdefault("__warningregistry__", {}),
+    )
+
+
+def _module_for_file(filename: str) -> types.ModuleType | None:
+    for module in list(sys.modules.values()):
+        if getattr(module, "__file__", None) == filename:
+            return module
+    return None
+
+
+_RecordedWarning = Tuple[str, Type[Warning], str, int]
+
+
+def _convert_recording_warnings(code: str) -> Tuple[str, List[_RecordedWarning]]:
+    """:func:`convert` ``code`` in a worker, returning the warnings it emitted."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        new_code = convert(code)
+    recorded = [
+        (str(w.message), w.category, w.filename, w.lineno) for w in caught
+    ]
+    return new_code, recorded
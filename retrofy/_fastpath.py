@@ -0,0 +1,489 @@
+"""A lexical fast path for sources which only need trivial rewrites.
+
+Parsing a module with libcst, visiting it and generating code again is by far
+the most expensive part of :func:`retrofy._converters.convert`. Most modules
+only need a handful of the conversions, and some of those are purely lexical.
+This module offers:
+
+* :func:`sniff_features`, a single :mod:`tokenize` pass recording which of the
+  conversions could possibly apply. Unlike a regular expression over the raw
+  source it ignores strings and comments.
+* :func:`convert_builtin_generics`, which lowers ``list[int]`` and friends to
+  ``typing.List[int]`` by splicing the source text at positions found with
+  :mod:`ast` (a C parser, far cheaper than libcst). It only handles modules
+  where nothing else needs converting and whose layout it can reproduce
+  exactly as the libcst path would; otherwise it returns ``None`` and the
+  caller falls back to the full CST conversion.
+* :func:`convert`, which returns sources needing no conversion untouched (once
+  :mod:`ast` has checked that they are valid) and otherwise tries
+  :func:`convert_builtin_generics`. Plain ``type X = ...`` aliases, which
+  just lose their ``type`` keyword, are rewritten from the tokens first.
+"""
+
+from __future__ import annotations
+
+import ast
+import io
+import tokenize
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+from ._transformations.collections_abc import COLLECTIONS_ABC_CONFIG
+from ._transformations.pep585_imports import _ALL_CONFIGS as _PEP585_CONFIGS
+from ._transformations.typing_extensions import TYPING_EXTENSIONS_CONFIG
+
+# The oldest Python whose syntax the converted code may need to parse on.
+# Sources are checked against it rather than the running interpreter, whose
+# grammar may be newer than both the target and libcst: anything this
+# rejects goes through libcst, which reports what it can't parse.
+_TARGET_FEATURE_VERSION = (3, 7)
+
+# Built-in generics and the ``typing`` alias they are lowered to.
+TYPING_GENERIC_ALIASES = {
+    "list": "List",
+    "dict": "Dict",
+    "tuple": "Tuple",
+}
+
+# The top-level modules whose imports the backport passes rewrite.
+BACKPORT_MODULES = frozenset(
+    config.source_module.partition(".")[0]
+    for config in (TYPING_EXTENSIONS_CONFIG, COLLECTIONS_ABC_CONFIG, *_PEP585_CONFIGS)
+)
+
+# Tokens which don't separate a name from a following ``[``.
+_TRIVIA = frozenset({tokenize.NL, tokenize.COMMENT})
+
+# Tokens after which a new logical line starts.
+_LINE_STARTS = frozenset(
+    {tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING},
+)
+
+
+class SourceFeatures(NamedTuple):
+    """Which conversions may apply to a source.
+
+    Each flag is a necessary condition for the corresponding conversion to
+    change anything; a set flag doesn't guarantee that it will.
+    """
+
+    # ``list[...]``, ``dict[...]`` or ``tuple[...]``.
+    builtin_generic: bool
+    # ``:=``
+    walrus: bool
+    # ``type X = ...``, ``def f[T]`` or ``class C[T]``.
+    type_params: bool
+    # A ``dataclass`` name.
+    dataclass: bool
+    # A line starting with ``match``.
+    match: bool
+    # ``|``
+    union: bool
+    # Any of the modules handled by the backport passes which are named.
+    backport_modules: FrozenSet[str]
+
+    def needs_conversion(self) -> bool:
+        return any(self)
+
+    def only_builtin_generic(self) -> bool:
+        return self.builtin_generic and not (
+            self.walrus
+            or self.type_params
+            or self.dataclass
+            or self.match
+            or self.union
+            or self.backport_modules
+        )
+
+
+# What to assume when a source can't be sniffed.
+ALL_FEATURES = SourceFeatures(
+    builtin_generic=True,
+    walrus=True,
+    type_params=True,
+    dataclass=True,
+    match=True,
+    union=True,
+    backport_modules=BACKPORT_MODULES,
+)
+
+
+def _tokenize(code: str) -> Optional[List[tokenize.TokenInfo]]:
+    try:
+        return list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except tokenize.TokenError:
+        return None
+    except SyntaxError:
+        # e.g. an IndentationError from an inconsistent dedent.
+        return None
+
+
+def _is_f_string(token: tokenize.TokenInfo) -> bool:
+    # Before Python 3.12 an f-string is a single STRING token, which would
+    # hide the expressions inside it.
+    if token.type != tokenize.STRING:
+        return False
+    prefix = token.string[: token.string.index(token.string[-1])]
+    return "f" in prefix.lower()
+
+
+def sniff_features(code: str) -> Optional[SourceFeatures]:
+    """Tokenize ``code`` once and record which conversions may apply.
+
+    Returns ``None`` if the source can't be analysed lexically (it doesn't
+    tokenize, or hides code inside f-strings on older Pythons), in which case
+    every conversion should be assumed to apply.
+    """
+    tokens = _tokenize(code)
+    if tokens is None:
+        return None
+    # Only the tokens which carry meaning; NEWLINE/INDENT/DEDENT are kept to
+    # find the start of logical lines.
+    significant = [token for token in tokens if token.type not in _TRIVIA]
+
+    builtin_generic = walrus = type_params = dataclass = match = union = False
+    backport_modules = set()
+    previous = None
+    for i, token in enumerate(significant):
+        if _is_f_string(token):
+            return None
+        following = significant[i + 1] if i + 1 < len(significant) else None
+        if token.type == tokenize.OP:
+            if token.string == ":=":
+                walrus = True
+            elif token.string == "|":
+                union = True
+        elif token.type == tokenize.NAME:
+            name = token.string
+            if name in TYPING_GENERIC_ALIASES:
+                if following is not None and following.string == "[":
+                    builtin_generic = True
+            elif name == "type":
+                if following is not None and following.type == tokenize.NAME:
+                    type_params = True
+            elif name in ("def", "class"):
+                after = significant[i + 2] if i + 2 < len(significant) else None
+                if after is not None and after.string == "[":
+                    type_params = True
+            elif name == "dataclass":
+                dataclass = True
+            elif name == "match":
+                if previous is None or previous.type in _LINE_STARTS:
+                    match = True
+            elif name in BACKPORT_MODULES:
+                backport_modules.add(name)
+        previous = token
+
+    return SourceFeatures(
+        builtin_generic=builtin_generic,
+        walrus=walrus,
+        type_params=type_params,
+        dataclass=dataclass,
+        match=match,
+        union=union,
+        backport_modules=frozenset(backport_modules),
+    )
+
+
+def _line_offsets(lines: List[bytes]) -> List[int]:
+    """The byte offset of the start of each (1-indexed) line."""
+    offsets = [0, 0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    return offsets
+
+
+def _alone_on_lines(
+    stmt: ast.stmt,
+    lines: List[bytes],
+) -> bool:
+    """Whether ``stmt`` is the only statement on the lines it spans."""
+    if stmt.col_offset != 0 or stmt.end_lineno is None:
+        return False
+    rest = lines[stmt.end_lineno - 1][stmt.end_col_offset :].strip()
+    return not rest or rest.startswith(b"#")
+
+
+def _is_simple_docstring(stmt: ast.stmt, code: str) -> bool:
+    """Whether ``stmt`` is a docstring made of a single string literal.
+
+    libcst doesn't treat implicitly concatenated strings as a docstring.
+    """
+    if not (
+        isinstance(stmt, ast.Expr)
+        and isinstance(stmt.value, ast.Constant)
+        and isinstance(stmt.value.value, (str, bytes))
+    ):
+        return False
+    source = ast.get_source_segment(code, stmt)
+    tokens = _tokenize(source or "")
+    if tokens is None:
+        return False
+    return sum(token.type == tokenize.STRING for token in tokens) == 1
+
+
+def _is_future_import(stmt: ast.stmt) -> bool:
+    return isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"
+
+
+def _typing_import_line(
+    tree: ast.Module,
+    code: str,
+    lines: List[bytes],
+) -> Optional[int]:
+    """The line before which ``import typing`` goes, as libcst would put it.
+
+    That is after the docstring and any ``__future__`` imports, or before the
+    first statement (and its decorators) when there are none. Returns ``None``
+    for layouts this module doesn't reproduce.
+    """
+    body = tree.body
+    index = 0
+    if body and _is_simple_docstring(body[0], code):
+        index = 1
+    while index < len(body) and _is_future_import(body[index]):
+        index += 1
+    for stmt in body[:index]:
+        if not _alone_on_lines(stmt, lines):
+            return None
+    if index:
+        end_lineno = body[index - 1].end_lineno
+        return None if end_lineno is None else end_lineno + 1
+    first = body[0]
+    decorators = getattr(first, "decorator_list", ())
+    return min([first.lineno] + [decorator.lineno for decorator in decorators])
+
+
+def _binds_generic_name(node: ast.AST) -> bool:
+    """Whether ``node`` binds one of the built-in generics' names."""
+    if isinstance(node, ast.Name):
+        stored = not isinstance(node.ctx, ast.Load)
+        return stored and node.id in TYPING_GENERIC_ALIASES
+    if isinstance(node, ast.arg):
+        name: Optional[str] = node.arg
+    elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        name = node.name
+    elif isinstance(node, ast.alias):
+        name = node.asname or node.name.partition(".")[0]
+    elif isinstance(node, (ast.Global, ast.Nonlocal)):
+        return not TYPING_GENERIC_ALIASES.keys().isdisjoint(node.names)
+    elif isinstance(node, ast.ExceptHandler):
+        name = node.name
+    else:
+        # MatchAs, MatchStar and MatchMapping, on Pythons which have them.
+        name = getattr(node, "name", None) or getattr(node, "rest", None)
+    return name in TYPING_GENERIC_ALIASES
+
+
+def _annotation_generics(tree: ast.Module) -> Optional[List[ast.Name]]:
+    """The names of the built-in generic subscripts to lower in ``tree``.
+
+    Only subscripts within annotations are handled here. Returns ``None``
+    (leaving the module to the CST conversion, which knows more about type
+    contexts and scopes) if any other built-in generic subscript is found,
+    if one of the names is rebound, or if an annotation has calls or
+    subscripted subscripts in it.
+    """
+    annotations: List[ast.expr] = []
+    generics = 0
+    for node in ast.walk(tree):
+        if _binds_generic_name(node):
+            return None
+        if isinstance(node, ast.Subscript):
+            value = node.value
+            if isinstance(value, ast.Name) and value.id in TYPING_GENERIC_ALIASES:
+                generics += 1
+        elif isinstance(node, ast.arg):
+            if node.annotation is not None:
+                annotations.append(node.annotation)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.returns is not None:
+                annotations.append(node.returns)
+        elif isinstance(node, ast.AnnAssign):
+            annotations.append(node.annotation)
+
+    names: List[ast.Name] = []
+    for annotation in annotations:
+        for node in ast.walk(annotation):
+            if isinstance(node, ast.Call):
+                return None
+            if not isinstance(node, ast.Subscript):
+                continue
+            value = node.value
+            if isinstance(value, ast.Subscript):
+                return None
+            if isinstance(value, ast.Name) and value.id in TYPING_GENERIC_ALIASES:
+                names.append(value)
+    if len(names) != generics:
+        return None
+    return names
+
+
+def convert_builtin_generics(
+    code: str,
+    features: Optional[SourceFeatures] = None,
+) -> Optional[str]:
+    """Lower built-in generic subscripts by editing the source text.
+
+    Produces the same output as the CST conversion, or returns ``None`` if
+    ``code`` needs anything other than this rewrite, or has a layout (such as
+    ``\\r\\n`` line endings) which isn't handled here.
+    """
+    if features is None:
+        features = sniff_features(code)
+    if features is None or not features.only_builtin_generic():
+        return None
+    if "\r" in code or not code.endswith("\n"):
+        return None
+    try:
+        tree = ast.parse(code, feature_version=_TARGET_FEATURE_VERSION)
+    except SyntaxError:
+        # Let the CST path report it.
+        return None
+
+    subscripts = _annotation_generics(tree)
+    if subscripts is None:
+        return None
+
+    # ``ast`` column offsets are in UTF-8 bytes.
+    encoded = code.encode("utf-8")
+    lines = encoded.split(b"\n")
+    offsets = _line_offsets(lines)
+    edits: List[Tuple[int, int, bytes]] = []
+    for value in subscripts:
+        start = offsets[value.lineno] + value.col_offset
+        end = start + len(value.id)
+        alias = TYPING_GENERIC_ALIASES[value.id]
+        edits.append((start, end, f"typing.{alias}".encode("ascii")))
+    if not edits:
+        return code
+
+    # The source doesn't mention ``typing`` (see only_builtin_generic), so
+    # the import is always needed.
+    import_line = _typing_import_line(tree, code, lines)
+    if import_line is None:
+        return None
+    start = offsets[import_line]
+    edits.append((start, start, b"import typing\n"))
+
+    chunks: List[bytes] = []
+    position = 0
+    for start, end, text in sorted(edits):
+        chunks.append(encoded[position:start])
+        chunks.append(text)
+        position = end
+    chunks.append(encoded[position:])
+    return b"".join(chunks).decode("utf-8")
+
+
+def _type_alias_edits(
+    significant: List[tokenize.TokenInfo],
+    index: int,
+) -> Optional[List[Tuple[Tuple[int, int], Tuple[int, int], str]]]:
+    """The edits turning the ``type X = ...`` at ``significant[index]`` into
+    ``X = ...``, or ``None`` if it isn't a plain, valid alias statement.
+    """
+    name = significant[index + 1]
+    equal = significant[index + 2]
+    if name.type != tokenize.NAME or equal.string != "=":
+        # e.g. ``type X[T] = ...``, which needs TypeVars.
+        return None
+    depth = 0
+    for position in range(index + 3, len(significant)):
+        token = significant[position]
+        if token.type in _LINE_STARTS:
+            break
+        if position == index + 3 and token.string in ("*", "**"):
+            return None
+        if token.string in ("(", "[", "{"):
+            depth += 1
+        elif token.string in (")", "]", "}"):
+            depth -= 1
+        elif token.string == ";":
+            # The CST conversion leaves aliases sharing a line untouched.
+            return None
+        elif depth == 0 and token.string in (",", "=", "yield"):
+            # Not a single expression, so not a valid alias, though it would
+            # be a valid assignment.
+            return None
+    else:
+        return None
+    # The CST conversion builds a fresh assignment, so normalises the
+    # whitespace around ``=``.
+    following = significant[index + 3]
+    return [
+        (significant[index].start, name.start, ""),
+        (name.end, equal.start, " "),
+        (equal.end, following.start, " "),
+    ]
+
+
+def _strip_type_aliases(code: str) -> Optional[str]:
+    """Rewrite every ``type X = ...`` statement in ``code`` as ``X = ...``.
+
+    Returns ``None`` if ``code`` has other PEP 695 syntax (generic aliases,
+    classes or functions) or aliases the CST conversion would treat
+    differently. The result hasn't been checked to be valid Python.
+    """
+    tokens = _tokenize(code)
+    if tokens is None:
+        return None
+    significant = [token for token in tokens if token.type not in _TRIVIA]
+
+    edits: List[Tuple[Tuple[int, int], Tuple[int, int], str]] = []
+    previous = None
+    for index, token in enumerate(significant[:-3]):
+        if token.type == tokenize.NAME:
+            following = significant[index + 1]
+            if token.string in ("def", "class"):
+                if significant[index + 2].string == "[":
+                    return None
+            elif token.string == "type" and following.type == tokenize.NAME:
+                if previous is not None and previous.type not in _LINE_STARTS:
+                    return None
+                alias_edits = _type_alias_edits(significant, index)
+                if alias_edits is None:
+                    return None
+                edits.extend(alias_edits)
+        previous = token
+    if not edits:
+        return None
+
+    lines = code.splitlines(keepends=True)
+    offsets = [0, 0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    chunks: List[str] = []
+    position = 0
+    for (start_row, start_col), (end_row, end_col), text in edits:
+        start = offsets[start_row] + start_col
+        chunks.append(code[position:start])
+        chunks.append(text)
+        position = offsets[end_row] + end_col
+    chunks.append(code[position:])
+    return "".join(chunks)
+
+
+def convert(code: str, features: SourceFeatures) -> Optional[str]:
+    """Convert ``code`` without libcst, if that can be done exactly.
+
+    Sources which need no conversion at all are returned as they are, once
+    :mod:`ast` has confirmed they're valid on the oldest target Python. Plain
+    ``type X = ...`` aliases are rewritten textually. Returns ``None`` when
+    the full CST conversion is needed (including to report a syntax error).
+    """
+    if features.type_params:
+        others = features._replace(type_params=False, builtin_generic=False)
+        if others.needs_conversion():
+            return None
+        stripped = _strip_type_aliases(code)
+        if stripped is None:
+            return None
+        code = stripped
+        features = features._replace(type_params=False)
+    if features.needs_conversion():
+        return convert_builtin_generics(code, features)
+    try:
+        ast.parse(code, feature_version=_TARGET_FEATURE_VERSION)
+    except SyntaxError:
+        return None
+    return code
@@ -19,7 +19,7 @@ from packaging.version import InvalidVersion, Version
 from setuptools_ext import WheelModifier
 import tomlkit
 
-from ._converters import convert
+from ._converters import convert_all
 
 _log = logging.getLogger("retrofy.build")
 
@@ -369,16 +369,15 @@ def compatibility_via_rewrite(wheel: pathlib.Path):
         whl = WheelModifier(whl_zip)
         existing_entries = set(whl_zip.namelist())
 
-        for filename in whl_zip.namelist():
-            if filename.endswith(".py"):
-                code = whl.read(filename).decode("utf-8")
-                new_code = convert(code)
-                if new_code != code:
-                    _log.info("Converted %s to compatibility syntax", filename)
-                    whl.write(filename, new_code)
-                    has_modifications = True
-                    if _LAZY_RUNTIME_IMPORT_MARKER in new_code:
-                        lazy_runtime_dirs.add(posixpath.dirname(filename))
+        filenames = [name for name in whl_zip.namelist() if name.endswith(".py")]
+        codes = [whl.read(filename).decode("utf-8") for filename in filenames]
+        for filename, code, new_code in zip(filenames, codes, convert_all(codes)):
+            if new_code != code:
+                _log.info("Converted %s to compatibility syntax", filename)
+                whl.write(filename, new_code)
+                has_modifications = True
+                if _LAZY_RUNTIME_IMPORT_MARKER in new_code:
+                    lazy_runtime_dirs.add(posixpath.dirname(filename))
 
         if lazy_runtime_dirs:
             payload = _embedded_runtime_files()
@@ -561,9 +560,9 @@ def lower_sdist(sdist_path: pathlib.Path) -> None:
         # source lowering is universally useful even when the project
         # has not opted into metadata lowering via ``target-python``.
         lazy_runtime_dirs: set[str] = set()
-        for py in root.rglob("*.py"):
-            text = py.read_text(encoding="utf-8")
-            new_text = convert(text)
+        paths = list(root.rglob("*.py"))
+        texts = [py.read_text(encoding="utf-8") for py in paths]
+        for py, text, new_text in zip(paths, texts, convert_all(texts)):
             if new_text != text:
                 py.write_text(new_text, encoding="utf-8")
                 _log.info(
@@ -12,14 +12,29 @@ generic-subscriptable ABCs on Python < 3.9).
 
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple
+import functools
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import libcst as cst
 
 from .import_utils import EnhancedImportManager
 
+_T = TypeVar("_T")
+
 
 @dataclass(frozen=True)
 class BackportFeature:
@@ -42,33 +57,72 @@ class BackportConfig:
     fallback_module: str  # e.g. "typing_extensions", "typing"
     features: Tuple[BackportFeature, ...] = field(default_factory=tuple)
 
-    @property
+    @functools.cached_property
     def feature_lookup(self) -> Dict[str, BackportFeature]:
+        # The configs are module-level constants, so build this once rather
+        # than per analysed module. Shared, so it must not be mutated.
         return {f.name: f for f in self.features}
 
+    @functools.cached_property
+    def versions(self) -> Tuple[Tuple[int, int], ...]:
+        """The distinct minimum versions of the features, in order."""
+        return tuple(sorted({f.min_version for f in self.features}))
+
+    @functools.cached_property
+    def _version_slots(self) -> Dict[str, int]:
+        # The index in :attr:`versions` of each feature's minimum version, by
+        # feature name: strings cache their hash, whereas a version tuple is
+        # hashed afresh on every lookup.
+        index = {version: i for i, version in enumerate(self.versions)}
+        return {f.name: index[f.min_version] for f in self.features}
+
+    def group_by_version(
+        self,
+        items: Iterable[Tuple[BackportFeature, _T]],
+    ) -> List[Tuple[Tuple[int, int], List[_T]]]:
+        """Group ``items`` by their feature's minimum version, in version order.
+
+        A config only has a handful of versions, so this fills a slot per
+        version (in the order of :attr:`versions`) rather than building a dict
+        of groups and sorting its keys each time.
+        """
+        slots = self._version_slots
+        buckets: List[List[_T]] = [[] for _ in self.versions]
+        for feature, item in items:
+            buckets[slots[feature.name]].append(item)
+        return [
+            (version, bucket)
+            for version, bucket in zip(self.versions, buckets)
+            if bucket
+        ]
+
 
 # ---------------------------------------------------------------------------
 # Dotted-module helpers
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=None)
+def _module_path(dotted: str) -> Tuple[str, Tuple[str, ...]]:
+    """The first name of ``dotted``, and the rest (last first) as matched."""
+    first, *rest = dotted.split(".")
+    return first, tuple(reversed(rest))
+
+
 def _module_matches(node: Optional[cst.BaseExpression], dotted: str) -> bool:
     """Whether a CST node represents the dotted module name ``dotted``."""
-    if node is None:
-        return False
-    parts = dotted.split(".")
+    first, rest = _module_path(dotted)
     cur = node
-    for part in reversed(parts[1:]):
-        if not isinstance(cur, cst.Attribute):
-            return False
-        if not isinstance(cur.attr, cst.Name) or cur.attr.value != part:
+    for part in rest:
+        if type(cur) is not cst.Attribute or cur.attr.value != part:
             return False
         cur = cur.value
-    if not isinstance(cur, cst.Name):
-        return False
-    return cur.value == parts[0]
+    return type(cur) is cst.Name and cur.value == first
 
 
+# libcst nodes are immutable, so the fixed parts of the generated version
+# checks (and the module names, of which there are only a few) are shared.
+@functools.lru_cache(maxsize=None)
 def _dotted_to_cst(dotted: str) -> cst.BaseExpression:
     parts = dotted.split(".")
     node: cst.BaseExpression = cst.Name(parts[0])
@@ -77,44 +131,146 @@ def _dotted_to_cst(dotted: str) -> cst.BaseExpression:
     return node
 
 
-def _make_direct_import(dotted: str) -> cst.SimpleStatementLine:
-    return cst.SimpleStatementLine(
-        [cst.Import([cst.ImportAlias(_dotted_to_cst(dotted))])],
-        trailing_whitespace=cst.TrailingWhitespace(newline=cst.Newline()),
+@functools.lru_cache(maxsize=256)
+def _module_attribute(dotted: str, name: str) -> cst.Attribute:
+    """``<dotted>.<name>``, as assigned to and from in the version checks."""
+    return cst.Attribute(value=_dotted_to_cst(dotted), attr=cst.Name(name))
+
+
+_SYS_VERSION_INFO = cst.Attribute(cst.Name("sys"), cst.Name("version_info"))
+_LESS_THAN = cst.LessThan()
+_GREATER_THAN_EQUAL = cst.GreaterThanEqual()
+# Leading lines of a version check: a blank line at module level.
+_MODULE_LEADING_LINES = (cst.EmptyLine(),)
+_NESTED_LEADING_LINES = ()
+
+
+@functools.lru_cache(maxsize=None)
+def _version_tuple(version: Tuple[int, int]) -> cst.Tuple:
+    """The ``(X, Y)`` compared against; there are only a few versions."""
+    return cst.Tuple(
+        [
+            cst.Element(cst.Integer(str(version[0]))),
+            cst.Element(cst.Integer(str(version[1]))),
+        ],
     )
 
 
-def _has_early_direct_import(
-    body: List[cst.BaseStatement],
-    dotted: str,
-) -> bool:
-    for stmt in body:
-        if isinstance(stmt, cst.SimpleStatementLine):
-            has_any_import = any(
-                isinstance(s, (cst.Import, cst.ImportFrom)) for s in stmt.body
-            )
-            if not has_any_import:
-                return False
-            for substmt in stmt.body:
-                if isinstance(substmt, cst.Import):
-                    for alias in substmt.names:
-                        if _module_matches(alias.name, dotted):
-                            return True
-        else:
-            return False
-    return False
+# ---------------------------------------------------------------------------
+# Visitor dispatch
+# ---------------------------------------------------------------------------
+
+_Hook = Callable[..., Any]
+# Cache keys: a node type, or a node type and one of its attributes.
+_HookKey = Union[type, Tuple[type, str]]
+
+_MISSING: Any = object()
+
+
+def _ignore_attribute(self: Any, node: cst.CSTNode, attribute: str) -> None:
+    pass
 
 
-def _ensure_direct_import(
-    body: List[cst.BaseStatement],
-    dotted: str,
-    insert_position_fn,
-) -> List[cst.BaseStatement]:
-    if _has_early_direct_import(body, dotted):
-        return body
-    pos = insert_position_fn(body)
-    body.insert(pos, _make_direct_import(dotted))
-    return body
+class _CachedDispatch:
+    """Look up each ``visit_<Node>``/``leave_<Node>`` hook once per class.
+
+    libcst formats a hook's name and looks it up for every node, and for every
+    attribute of every node. Its visitor base classes define a no-op hook for
+    every node type, so most of those lookups find a method that does
+    nothing. Here the lookups are cached per class and the no-ops skipped.
+    Attribute hooks (``visit_<Node>_<attribute>``) are rare, so a class
+    without any doesn't look them up at all.
+    """
+
+    # The libcst base class whose no-op hooks are skipped.
+    _hook_base: ClassVar[type]
+    _visit_hooks: ClassVar[Dict[_HookKey, Optional[_Hook]]]
+    _leave_hooks: ClassVar[Dict[_HookKey, Optional[_Hook]]]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._visit_hooks = {}
+        cls._leave_hooks = {}
+        base = getattr(cls, "_hook_base", None)
+        if base is None:
+            return
+        if any(
+            name.startswith(("visit_", "leave_"))
+            and name.count("_") > 1
+            and getattr(cls, name) is not getattr(base, name, None)
+            for name in dir(cls)
+        ):
+            cls.on_visit_attribute = _CachedDispatch.on_visit_attribute  # type: ignore[method-assign]
+            cls.on_leave_attribute = _CachedDispatch.on_leave_attribute  # type: ignore[method-assign]
+        else:
+            cls.on_visit_attribute = _ignore_attribute  # type: ignore[method-assign]
+            cls.on_leave_attribute = _ignore_attribute  # type: ignore[method-assign,assignment]
+
+    @classmethod
+    def _find_hook(cls, kind: str, key: _HookKey) -> Optional[_Hook]:
+        if isinstance(key, tuple):
+            node_type, attribute = key
+            name = f"{kind}_{node_type.__name__}_{attribute}"
+        else:
+            name = f"{kind}_{key.__name__}"
+        hook = getattr(cls, name, None)
+        if hook is not None and hook is getattr(cls._hook_base, name, None):
+            hook = None
+        cache = cls._visit_hooks if kind == "visit" else cls._leave_hooks
+        cache[key] = hook
+        return hook
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        node_type = type(node)
+        visit = self._visit_hooks.get(node_type, _MISSING)
+        if visit is _MISSING:
+            visit = self._find_hook("visit", node_type)
+        return visit is None or visit(self, node) is not False
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        key = (type(node), attribute)
+        visit = self._visit_hooks.get(key, _MISSING)
+        if visit is _MISSING:
+            visit = self._find_hook("visit", key)
+        if visit is not None:
+            visit(self, node)
+
+    def on_leave_attribute(self, original_node: cst.CSTNode, attribute: str) -> None:
+        key = (type(original_node), attribute)
+        leave = self._leave_hooks.get(key, _MISSING)
+        if leave is _MISSING:
+            leave = self._find_hook("leave", key)
+        if leave is not None:
+            leave(self, original_node)
+
+
+class _CachedDispatchVisitor(_CachedDispatch, cst.CSTVisitor):
+    _hook_base = cst.CSTVisitor
+
+    def on_leave(self, original_node: cst.CSTNode) -> None:
+        node_type = type(original_node)
+        leave = self._leave_hooks.get(node_type, _MISSING)
+        if leave is _MISSING:
+            leave = self._find_hook("leave", node_type)
+        if leave is not None:
+            leave(self, original_node)
+
+
+class _CachedDispatchTransformer(_CachedDispatch, cst.CSTTransformer):
+    _hook_base = cst.CSTTransformer
+
+    def on_leave(  # type: ignore[override]
+        self,
+        original_node: cst.CSTNode,
+        updated_node: cst.CSTNode,
+    ) -> Union[cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel]:
+        node_type = type(original_node)
+        leave = self._leave_hooks.get(node_type, _MISSING)
+        if leave is _MISSING:
+            leave = self._find_hook("leave", node_type)
+        if leave is None:
+            return updated_node
+        return leave(self, original_node, updated_node)
 
 
 # ---------------------------------------------------------------------------
@@ -122,8 +278,19 @@ def _ensure_direct_import(
 # ---------------------------------------------------------------------------
 
 
+# Scopes are tracked by an integer ID rather than by their tuple of nodes,
+# which would be hashed through libcst's Python-level CSTNode.__hash__ for
+# every lookup. A nested scope's ID is the ``id()`` of its innermost node
+# (which has a single place in the tree, so identifies the whole path), and
+# this is the module's.
+_MODULE_SCOPE = 0
+
+
 @dataclass
 class _UsageInfo:
+    # Written by hand: dataclass only accepts a slots argument from 3.10.
+    __slots__ = ("feature", "alias", "import_style", "scope_path")
+
     feature: BackportFeature
     alias: str  # the local binding name in the user's code
     import_style: str  # "from_source" or "source_dot"
@@ -132,96 +299,134 @@ class _UsageInfo:
 
 @dataclass
 class _ImportStmtInfo:
+    __slots__ = ("import_node", "features", "scope_path", "aliases")
+
     import_node: cst.ImportFrom
     features: List[BackportFeature]
     scope_path: Tuple[cst.CSTNode, ...]
+    # The local binding of each feature, by feature name.
+    aliases: Dict[str, str]
 
 
-class _AnalysisVisitor(cst.CSTVisitor):
+class _AnalysisVisitor(_CachedDispatchVisitor):
     def __init__(self, config: BackportConfig) -> None:
         self.config = config
         self.lookup = config.feature_lookup
         self.import_manager = EnhancedImportManager()
-        self.usages: List[_UsageInfo] = []
+        # The module-level ``from <source_module> import`` usages, kept apart
+        # from the others (each of which has its own index) so that the
+        # transformer needn't filter them out.
+        self.module_usages: List[_UsageInfo] = []
+        # The ``<source_module>.<feature>`` usages, by feature name and
+        # ``id()`` of the innermost scope node (which identifies the scope).
+        # Repeated uses of a feature in a scope are all equivalent, so only
+        # the first is recorded.
+        self._source_dot_usages: Dict[Tuple[str, int], _UsageInfo] = {}
         self.import_statements: List[_ImportStmtInfo] = []
-        self._scope_stack: List[cst.CSTNode] = []
-        # Scopes in which ``import <source_module>`` was found.
-        self._source_import_scopes: Dict[Tuple[cst.CSTNode, ...], bool] = {}
-        # Existing (scope_path, version, check_type) tuples we should not duplicate.
-        self._existing_version_checks: Set[
-            Tuple[Tuple[cst.CSTNode, ...], Tuple[int, int], str]
-        ] = set()
+        # The path of enclosing scope nodes at each depth, innermost last.
+        # Each path extends its parent's, so the current one can be recorded
+        # as it is rather than copied out of a stack of nodes.
+        self._scope_paths: List[Tuple[cst.CSTNode, ...]] = [()]
+        # Scopes in which ``import <source_module>`` was found, by scope ID.
+        self._source_import_scopes: Dict[int, Tuple[cst.CSTNode, ...]] = {}
+        # The ``id()`` of every ``if sys.version_info ...`` block, so that the
+        # transformer (which walks the same tree) needn't classify them again.
+        self._version_check_ifs: Set[int] = set()
+        # Existing (scope ID, version, check_type) tuples we should not duplicate.
+        self._existing_version_checks: Set[Tuple[int, Tuple[int, int], str]] = set()
 
     # -- scope tracking -----------------------------------------------------
 
-    def visit_Module(self, node: cst.Module) -> None:
-        self.import_manager.scan_imports(node.body)
-
     def leave_Module(self, original_node: cst.Module) -> None:
         # Module-level usages depend on having seen every ImportFrom first,
         # so detect after the traversal rather than at visit_Module time.
         self._detect_module_level_from_imports(original_node)
 
+    def _enter_scope(self, node: cst.CSTNode) -> None:
+        self._scope_paths.append((*self._scope_paths[-1], node))
+
+    def _leave_scope(self, node: cst.CSTNode) -> None:
+        scope_path = self._scope_paths[-1]
+        if scope_path and scope_path[-1] is node:
+            self._scope_paths.pop()
+
     def visit_If(self, node: cst.If) -> bool:
-        self._scope_stack.append(node)
+        self._enter_scope(node)
         self._detect_existing_version_check(node)
         return True
 
     def leave_If(self, original_node: cst.If) -> None:
-        if self._scope_stack and self._scope_stack[-1] is original_node:
-            self._scope_stack.pop()
+        self._leave_scope(original_node)
 
     def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
-        self._scope_stack.append(node)
+        self._enter_scope(node)
         return True
 
     def leave_FunctionDef(self, original_node: cst.FunctionDef) -> None:
-        if self._scope_stack and self._scope_stack[-1] is original_node:
-            self._scope_stack.pop()
+        self._leave_scope(original_node)
 
     # -- import detection ---------------------------------------------------
+    # Nothing inside an import statement is of interest (in particular, its
+    # dotted names aren't attribute accesses), so these never descend.
 
     def visit_Import(self, node: cst.Import) -> bool:
+        source_module = self.config.source_module
         for alias in node.names:
-            if isinstance(alias, cst.ImportAlias) and _module_matches(
-                alias.name,
-                self.config.source_module,
-            ):
-                self._source_import_scopes[tuple(self._scope_stack)] = True
-        return True
+            if _module_matches(alias.name, source_module):
+                scope_path = self._scope_paths[-1]
+                self._source_import_scopes[
+                    id(scope_path[-1]) if scope_path else _MODULE_SCOPE
+                ] = scope_path
+        return False
 
     def visit_ImportFrom(self, node: cst.ImportFrom) -> bool:
         if not _module_matches(node.module, self.config.source_module):
-            return True
-        features = self._extract_features_from_import(node)
-        if features:
-            self.import_statements.append(
-                _ImportStmtInfo(
-                    import_node=node,
-                    features=features,
-                    scope_path=tuple(self._scope_stack),
-                ),
-            )
-        if self._scope_stack:
-            self._record_from_import_usages(node)
-        return True
+            return False
+        features, aliases = self._extract_features_from_import(node)
+        if not features:
+            return False
+        scope_path = self._scope_paths[-1]
+        if not scope_path:
+            # Only these module-level imports are stripped by the
+            # transformer, so they're all the import manager needs to know
+            # about; that saves it scanning the module body separately.
+            self.import_manager.scan_import_from(node)
+        self.import_statements.append(
+            _ImportStmtInfo(
+                import_node=node,
+                features=features,
+                scope_path=scope_path,
+                aliases=aliases,
+            ),
+        )
+        return False
 
     def visit_Attribute(self, node: cst.Attribute) -> bool:
         # Detect ``<source_module>.<feature>`` attribute access. For dotted
         # source modules (e.g. collections.abc) the value side is itself an
-        # Attribute; for simple ones it's a Name.
-        if _module_matches(node.value, self.config.source_module):
-            feature_name = node.attr.value
-            if feature_name in self.lookup:
-                self.usages.append(
-                    _UsageInfo(
-                        feature=self.lookup[feature_name],
-                        alias=feature_name,
-                        import_style="source_dot",
-                        scope_path=tuple(self._scope_stack),
-                    ),
-                )
-        return True
+        # Attribute; for simple ones it's a Name. Most attributes aren't a
+        # feature's name, so check that first.
+        #
+        # Nothing inside a plain ``name.attr`` (or a matched, all-name
+        # ``<source_module>.<feature>``) is of interest, so only descend when
+        # the value is some other expression.
+        feature_name = node.attr.value
+        feature = self.lookup.get(feature_name)
+        if feature is None or not _module_matches(
+            node.value,
+            self.config.source_module,
+        ):
+            return type(node.value) is not cst.Name
+        scope_path = self._scope_paths[-1]
+        key = (feature_name, id(scope_path[-1]) if scope_path else _MODULE_SCOPE)
+        if key not in self._source_dot_usages:
+            self._source_dot_usages[key] = _UsageInfo(
+                feature=feature,
+                alias=feature_name,
+                import_style="source_dot",
+                scope_path=scope_path,
+            )
+        return False
 
     def _detect_module_level_from_imports(self, _node: cst.Module) -> None:
         # Walk the import_statements collected in visit_ImportFrom so that
@@ -229,114 +434,93 @@ class _AnalysisVisitor(cst.CSTVisitor):
         for info in self.import_statements:
             if info.scope_path:
                 continue
-            aliases = self._extract_feature_aliases(info.import_node)
             for feature in info.features:
-                self.usages.append(
+                self.module_usages.append(
                     _UsageInfo(
                         feature=feature,
-                        alias=aliases.get(feature.name, feature.name),
+                        alias=info.aliases[feature.name],
                         import_style="from_source",
                         scope_path=(),
                     ),
                 )
 
-    @staticmethod
-    def _extract_feature_aliases(import_node: cst.ImportFrom) -> Dict[str, str]:
-        aliases: Dict[str, str] = {}
-        if isinstance(import_node.names, cst.ImportStar):
-            return aliases
-        names = (
-            import_node.names
-            if isinstance(import_node.names, (list, tuple))
-            else [import_node.names]
-        )
-        for n in names:
-            if isinstance(n, cst.ImportAlias):
-                fname = n.name.value
-                alias = n.asname.name.value if n.asname else fname
-                aliases[fname] = alias
-        return aliases
-
     def _extract_features_from_import(
         self,
         node: cst.ImportFrom,
-    ) -> List[BackportFeature]:
-        if isinstance(node.names, cst.ImportStar):
-            return []
-        names = node.names if isinstance(node.names, (list, tuple)) else [node.names]
-        out = []
-        for name_item in names:
-            if isinstance(name_item, cst.ImportAlias):
-                fname = name_item.name.value
-                if fname in self.lookup:
-                    out.append(self.lookup[fname])
-        return out
-
-    def _record_from_import_usages(self, node: cst.ImportFrom) -> None:
-        if isinstance(node.names, cst.ImportStar):
-            return
-        names = node.names if isinstance(node.names, (list, tuple)) else [node.names]
-        for name_item in names:
-            if not isinstance(name_item, cst.ImportAlias):
-                continue
-            fname = name_item.name.value
-            if fname not in self.lookup:
+    ) -> Tuple[List[BackportFeature], Dict[str, str]]:
+        """The features imported by ``node`` and their local bindings.
+
+        The names are walked once here; the bindings are kept on the
+        :class:`_ImportStmtInfo` rather than re-extracted by each user.
+        """
+        features: List[BackportFeature] = []
+        aliases: Dict[str, str] = {}
+        if type(node.names) is cst.ImportStar:
+            return features, aliases
+        lookup = self.lookup
+        for name_item in node.names:  # type: ignore[union-attr]
+            # A dotted name would give a node here, which is never a feature.
+            fname: str = name_item.name.value  # type: ignore[assignment]
+            feature = lookup.get(fname)
+            if feature is None:
                 continue
-            alias = name_item.asname.name.value if name_item.asname else fname
-            self.usages.append(
-                _UsageInfo(
-                    feature=self.lookup[fname],
-                    alias=alias,
-                    import_style="from_source",
-                    scope_path=tuple(self._scope_stack),
-                ),
-            )
+            features.append(feature)
+            asname = name_item.asname
+            if asname is not None and type(asname.name) is cst.Name:
+                aliases[fname] = asname.name.value
+            else:
+                aliases[fname] = fname
+        return features, aliases
 
     # -- existing version check detection (idempotence) --------------------
 
     def _detect_existing_version_check(self, node: cst.If) -> None:
         if not self._is_version_check(node.test):
             return
+        self._version_check_ifs.add(id(node))
         version = self._extract_version_info(node.test)
         if not version:
             return
         check_type = self._classify_version_check(node)
         if check_type:
-            scope = tuple(self._scope_stack[:-1])
+            # The check's own scope is the one enclosing it.
+            scope_path = self._scope_paths[-1]
+            scope = id(scope_path[-2]) if len(scope_path) > 1 else _MODULE_SCOPE
             self._existing_version_checks.add((scope, version, check_type))
 
     def _is_version_check(self, test_node: cst.BaseExpression) -> bool:
-        if not isinstance(test_node, cst.Comparison):
+        # Called for every ``if``, so compare exact (final) node types, and
+        # check the rarest part (the ``version_info`` attribute) first.
+        if type(test_node) is not cst.Comparison:
             return False
-        left = test_node.left
+        left = test_node.left  # type: ignore[attr-defined]
         return (
-            isinstance(left, cst.Attribute)
-            and isinstance(left.value, cst.Name)
-            and left.value.value == "sys"
-            and isinstance(left.attr, cst.Name)
+            type(left) is cst.Attribute
             and left.attr.value == "version_info"
+            and type(left.value) is cst.Name
+            and left.value.value == "sys"
         )
 
     def _extract_version_info(
         self,
         test_node: cst.BaseExpression,
     ) -> Optional[Tuple[int, int]]:
-        if not isinstance(test_node, cst.Comparison):
+        if type(test_node) is not cst.Comparison:
             return None
-        if len(test_node.comparisons) != 1:
+        comparisons = test_node.comparisons  # type: ignore[attr-defined]
+        if len(comparisons) != 1:
             return None
-        comparator = test_node.comparisons[0].comparator
-        if not isinstance(comparator, cst.Tuple):
+        comparator = comparisons[0].comparator
+        if type(comparator) is not cst.Tuple or len(comparator.elements) != 2:
             return None
-        if len(comparator.elements) != 2:
+        major_node, minor_node = (element.value for element in comparator.elements)
+        if type(major_node) is not cst.Integer or type(minor_node) is not cst.Integer:
             return None
         try:
-            major = int(comparator.elements[0].value.value)  # type: ignore[attr-defined]
-            minor = int(comparator.elements[1].value.value)  # type: ignore[attr-defined]
-        # Parens kept until PEP 758 backport (#23) lands; without them
-        # ruff format on target-version=py315 emits the PEP 758 form
-        # which pre-3.14 Pythons can't parse.
-        except (AttributeError, ValueError):  # fmt: skip
+            major = int(major_node.value)
+            minor = int(minor_node.value)
+        except ValueError:
+            # e.g. ``0x3``, which int() doesn't take without a base.
             return None
         return (major, minor)
 
@@ -349,6 +533,7 @@ class _AnalysisVisitor(cst.CSTVisitor):
         # from typing.
         src = self.config.source_module
         fb = self.config.fallback_module
+        lookup = self.lookup
 
         def _import_touches_a_feature(substmt: cst.ImportFrom) -> bool:
             if not (
@@ -356,56 +541,48 @@ class _AnalysisVisitor(cst.CSTVisitor):
                 or _module_matches(substmt.module, fb)
             ):
                 return False
-            names = self._import_alias_names(substmt)
-            return any(n in self.lookup for n in names)
+            # A set operation on the lookup's keys, looping in C.
+            return not lookup.keys().isdisjoint(self._import_alias_names(substmt))
 
         for stmt in node.body.body:
-            if not isinstance(stmt, cst.SimpleStatementLine):
+            if type(stmt) is not cst.SimpleStatementLine:
                 continue
-            for substmt in stmt.body:
-                if isinstance(substmt, cst.Assign):
-                    val = substmt.value
-                    target = substmt.targets[0].target if substmt.targets else None
+            for substmt in stmt.body:  # type: ignore[union-attr]
+                substmt_type = type(substmt)
+                if substmt_type is cst.Assign:
+                    val = substmt.value  # type: ignore[attr-defined]
+                    targets = substmt.targets  # type: ignore[attr-defined]
+                    target = targets[0].target if targets else None
                     if (
-                        isinstance(val, cst.Attribute)
+                        type(val) is cst.Attribute
                         and _module_matches(val.value, fb)
-                        and isinstance(target, cst.Attribute)
+                        and type(target) is cst.Attribute
                         and _module_matches(target.value, src)
-                        and isinstance(target.attr, cst.Name)
-                        and target.attr.value in self.lookup
+                        and target.attr.value in lookup
                     ):
                         return "assignment"
-                elif isinstance(
-                    substmt,
-                    cst.ImportFrom,
-                ) and _import_touches_a_feature(substmt):
+                elif substmt_type is cst.ImportFrom and _import_touches_a_feature(
+                    substmt,  # type: ignore[arg-type]
+                ):
                     return "conditional_import"
-        if isinstance(node.orelse, cst.Else):
-            for stmt in node.orelse.body.body:
-                if not isinstance(stmt, cst.SimpleStatementLine):
+        orelse = node.orelse
+        if type(orelse) is cst.Else:
+            for stmt in orelse.body.body:
+                if type(stmt) is not cst.SimpleStatementLine:
                     continue
-                for substmt in stmt.body:
-                    if isinstance(
+                for substmt in stmt.body:  # type: ignore[union-attr]
+                    if type(substmt) is cst.ImportFrom and _import_touches_a_feature(
                         substmt,
-                        cst.ImportFrom,
-                    ) and _import_touches_a_feature(substmt):
+                    ):
                         return "conditional_import"
         return None
 
     @staticmethod
     def _import_alias_names(import_node: cst.ImportFrom) -> List[str]:
-        if isinstance(import_node.names, cst.ImportStar):
+        names = import_node.names
+        if type(names) is cst.ImportStar:
             return []
-        names = (
-            import_node.names
-            if isinstance(import_node.names, (list, tuple))
-            else [import_node.names]
-        )
-        out: List[str] = []
-        for n in names:
-            if isinstance(n, cst.ImportAlias) and isinstance(n.name, cst.Name):
-                out.append(n.name.value)
-        return out
+        return [n.name.value for n in names if type(n.name) is cst.Name]  # type: ignore[union-attr]
 
 
 # ---------------------------------------------------------------------------
@@ -413,40 +590,63 @@ class _AnalysisVisitor(cst.CSTVisitor):
 # ---------------------------------------------------------------------------
 
 
-class _BackportTransformer(cst.CSTTransformer):
+class _BackportTransformer(_CachedDispatchTransformer):
     def __init__(self, analysis: _AnalysisVisitor) -> None:
         self.config = analysis.config
         self.analysis = analysis
         self.import_manager = analysis.import_manager
-        self.usages = analysis.usages
+        self.module_usages = analysis.module_usages
         self.import_statements = analysis.import_statements
         self.existing_version_checks = analysis._existing_version_checks
+        self._version_check_ifs = analysis._version_check_ifs
+        # Imports found inside a function or ``if`` block, by ``id()`` of the
+        # import node. libcst nodes compare by identity and the analysis
+        # visited the same tree, so leave_SimpleStatementLine can look its
+        # import up directly. (Keying by the node itself would give the same
+        # result, but through libcst's Python-level __hash__ and __eq__.)
+        # The infos keep the nodes alive, so their ids are stable.
+        self._nested_imports: Dict[int, _ImportStmtInfo] = {
+            id(info.import_node): info
+            for info in self.import_statements
+            if info.scope_path
+        }
 
         self.source_dot_assignments = self._plan_source_dot_assignments()
-        self._applied_assignments: Set[
-            Tuple[Tuple[cst.CSTNode, ...], Tuple[int, int]]
-        ] = set()
-        self._current_scope_stack: List[cst.CSTNode] = []
+        # The nested scopes needing assignments, by ``id()`` of their
+        # innermost node, so leave_If can rule out most blocks with one
+        # lookup. The scope paths keep the nodes alive.
+        self._assignment_scopes: Dict[int, Tuple[cst.CSTNode, ...]] = {
+            id(scope_path[-1]): scope_path
+            for scope_path in self.source_dot_assignments
+            if scope_path
+        }
+        # The (scope ID, version) of each assignment check added.
+        self._applied_assignments: Set[Tuple[int, Tuple[int, int]]] = set()
+        # The enclosing ``if sys.version_info ...`` blocks, innermost last.
+        self._version_checks: List[cst.If] = []
+        # The ``id()`` of every function and ``if`` on the way to something
+        # this pass rewrites. The others' bodies are left as they are, so
+        # aren't walked (and rebuilt) at all.
+        self._target_scopes: Set[int] = {
+            id(node)
+            for scope_path in (
+                *(info.scope_path for info in self._nested_imports.values()),
+                *self._assignment_scopes.values(),
+            )
+            for node in scope_path
+        }
 
     # -- planning -----------------------------------------------------------
 
     def _find_source_import_scope(self) -> Tuple[cst.CSTNode, ...]:
-        deepest: Tuple[cst.CSTNode, ...] = ()
-        max_depth = -1
-        for scope_path in self.analysis._source_import_scopes.keys():
-            if len(scope_path) > max_depth:
-                max_depth = len(scope_path)
-                deepest = scope_path
-        return deepest
+        # The deepest (first found, on a tie) scope importing the module.
+        return max(self.analysis._source_import_scopes.values(), key=len, default=())
 
     def _plan_source_dot_assignments(
         self,
     ) -> Dict[Tuple[cst.CSTNode, ...], Dict[str, BackportFeature]]:
-        assignments: Dict[
-            Tuple[cst.CSTNode, ...],
-            Dict[str, BackportFeature],
-        ] = defaultdict(dict)
-        dot_usages = [u for u in self.usages if u.import_style == "source_dot"]
+        # The analysis already keeps these apart from the other usages.
+        dot_usages = list(self.analysis._source_dot_usages.values())
         if not dot_usages:
             return {}
         common_scope = self._find_common_scope_path(
@@ -462,12 +662,10 @@ class _BackportTransformer(cst.CSTTransformer):
             optimal = common_scope
         else:
             optimal = import_scope
-        groups: Dict[str, List[_UsageInfo]] = defaultdict(list)
+        features: Dict[str, BackportFeature] = {}
         for u in dot_usages:
-            groups[u.feature.name].append(u)
-        for fname, us in groups.items():
-            assignments[optimal][fname] = us[0].feature
-        return dict(assignments)
+            features.setdefault(u.feature.name, u.feature)
+        return {optimal: features}
 
     def _find_common_scope_path(
         self,
@@ -475,39 +673,52 @@ class _BackportTransformer(cst.CSTTransformer):
     ) -> Tuple[cst.CSTNode, ...]:
         if not paths:
             return ()
+        first = paths[0]
         if len(paths) == 1:
-            return paths[0]
-        common: Tuple[cst.CSTNode, ...] = ()
-        depth = min(len(p) for p in paths)
-        for i in range(depth):
-            if all(p[i] is paths[0][i] for p in paths):
-                common = common + (paths[0][i],)
-            else:
+            return first
+        # zip() stops at the shortest path. The common part is a prefix of
+        # the first path, so it's sliced out once at the end.
+        depth = 0
+        for nodes in zip(*paths):
+            node = nodes[0]
+            if not all(other is node for other in nodes):
                 break
-        return common
+            depth += 1
+        return first[:depth]
 
     def _version_check_exists(
         self,
-        scope: Tuple[cst.CSTNode, ...],
+        scope: int,
         version: Tuple[int, int],
         check_type: str,
     ) -> bool:
         return (scope, version, check_type) in self.existing_version_checks
 
+    def needs_traversal(self) -> bool:
+        """Whether any edits are needed below the module's top level.
+
+        Nested imports are rewritten in leave_SimpleStatementLine and scoped
+        assignments added in leave_If; everything else is done by
+        leave_Module.
+        """
+        if any(info.scope_path for info in self.import_statements):
+            return True
+        return any(scope_path for scope_path in self.source_dot_assignments)
+
     # -- scope tracking during transform -----------------------------------
 
-    def visit_If(self, node: cst.If) -> None:
-        self._current_scope_stack.append(node)
+    def visit_If(self, node: cst.If) -> bool:
+        # The analysis classified each If already; keep track of the enclosing
+        # version checks rather than re-checking them for each nested import.
+        if id(node) in self._version_check_ifs:
+            self._version_checks.append(node)
+        return id(node) in self._target_scopes
 
-    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
-        self._current_scope_stack.append(node)
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        return id(node) in self._target_scopes
 
     def _is_inside_version_check(self) -> bool:
-        for scope_node in self._current_scope_stack:
-            if isinstance(scope_node, cst.If):
-                if self.analysis._is_version_check(scope_node.test):
-                    return True
-        return False
+        return bool(self._version_checks)
 
     # -- Module-level emission ---------------------------------------------
 
@@ -519,73 +730,81 @@ class _BackportTransformer(cst.CSTTransformer):
         if not self.import_statements and not self.source_dot_assignments:
             return updated_node
 
-        new_body = list(updated_node.body)
+        # The body is only copied by the edits that actually change it, so
+        # that a module needing none isn't rebuilt.
+        new_body: Sequence[cst.BaseStatement] = updated_node.body
 
         # Strip transformable names out of module-level ``from source import``
         # statements; nested imports are handled in leave_SimpleStatementLine.
-        module_imports = [s for s in self.import_statements if not s.scope_path]
-        for imp in module_imports:
-            for feature in imp.features:
-                new_body = self.import_manager.remove_from_imports(
-                    new_body,
-                    self.config.source_module,
-                    feature.name,
-                )
-
-        new_body = self.import_manager.ensure_sys_import(new_body)
+        new_body = self.import_manager.remove_names_from_imports(
+            new_body,
+            self.config.source_module,
+            {
+                feature.name
+                for imp in self.import_statements
+                if not imp.scope_path
+                for feature in imp.features
+            },
+        )
 
         module_assignments = self.source_dot_assignments.get((), {})
-        if module_assignments:
-            new_body = _ensure_direct_import(
-                new_body,
-                self.config.source_module,
-                self.import_manager.find_import_position,
-            )
+        # The module-level assignments need the source module imported too.
+        early_imports = (
+            [self.config.source_module, "sys"] if module_assignments else ["sys"]
+        )
+        new_body = self.import_manager.ensure_early_direct_imports(
+            new_body,
+            early_imports,
+        )
 
         version_check_pos = self.import_manager.find_post_import_position(new_body)
-        all_transforms: List[Tuple[Tuple[int, int], str, list]] = []
-
-        from_source_usages = [
-            u
-            for u in self.usages
-            if u.import_style == "from_source" and not u.scope_path
-        ]
-        if from_source_usages:
-            groups: Dict[Tuple[int, int], List[_UsageInfo]] = defaultdict(list)
-            for u in from_source_usages:
-                groups[u.feature.min_version].append(u)
-            for version, usages in groups.items():
-                if not self._version_check_exists((), version, "conditional_import"):
-                    all_transforms.append((version, "conditional_import", usages))
+        # The assignment checks come first, then the conditional imports, each
+        # in version order.
+        blocks: List[cst.If] = []
 
         if module_assignments:
-            groups2: Dict[Tuple[int, int], List[Tuple[str, BackportFeature]]] = (
-                defaultdict(list)
-            )
-            for fname, feature in module_assignments.items():
-                groups2[feature.min_version].append((fname, feature))
-            for version, features in groups2.items():
-                key = ((), version)
-                if (
-                    key not in self._applied_assignments
-                    and not self._version_check_exists((), version, "assignment")
+            for version, features in self.config.group_by_version(
+                (feature, (fname, feature))
+                for fname, feature in module_assignments.items()
+            ):
+                key = (_MODULE_SCOPE, version)
+                if key not in self._applied_assignments and not (
+                    self._version_check_exists(_MODULE_SCOPE, version, "assignment")
                 ):
                     self._applied_assignments.add(key)
-                    all_transforms.append((version, "assignment", features))
-
-        all_transforms.sort(key=lambda x: (x[1] == "conditional_import", x[0]))
+                    blocks.append(
+                        self._make_assignment_check(
+                            version,
+                            features,
+                            nested=False,
+                        ),
+                    )
 
-        for version, kind, data in all_transforms:
-            if kind == "conditional_import":
-                block = self._make_conditional_import_check(
+        if self.module_usages:
+            for version, usages in self.config.group_by_version(
+                (u.feature, u) for u in self.module_usages
+            ):
+                if not self._version_check_exists(
+                    _MODULE_SCOPE,
                     version,
-                    data,
-                    nested=False,
-                )
-            else:
-                block = self._make_assignment_check(version, data, nested=False)
-            new_body.insert(version_check_pos, block)
-            version_check_pos += 1
+                    "conditional_import",
+                ):
+                    blocks.append(
+                        self._make_conditional_import_check(
+                            version,
+                            usages,
+                            nested=False,
+                        ),
+                    )
+
+        if blocks:
+            new_body = [
+                *new_body[:version_check_pos],
+                *blocks,
+                *new_body[version_check_pos:],
+            ]
+        elif new_body is updated_node.body:
+            return updated_node
 
         return updated_node.with_changes(body=new_body)
 
@@ -594,12 +813,11 @@ class _BackportTransformer(cst.CSTTransformer):
         original_node: cst.If,
         updated_node: cst.If,
     ) -> cst.If:
-        current = None
-        for scope_path in self.source_dot_assignments.keys():
-            if scope_path and scope_path[-1] is original_node:
-                current = scope_path
-                break
-        if not current:
+        if self._version_checks and self._version_checks[-1] is original_node:
+            self._version_checks.pop()
+        scope = id(original_node)
+        current = self._assignment_scopes.get(scope)
+        if current is None:
             return updated_node
         scope_assignments = self.source_dot_assignments[current]
         if not scope_assignments:
@@ -608,30 +826,27 @@ class _BackportTransformer(cst.CSTTransformer):
         new_body = list(updated_node.body.body)
         insert_pos = 0
         for i, stmt in enumerate(new_body):
-            if isinstance(stmt, cst.SimpleStatementLine) and any(
-                isinstance(s, (cst.Import, cst.ImportFrom)) for s in stmt.body
+            if type(stmt) is cst.SimpleStatementLine and any(
+                type(s) is cst.Import or type(s) is cst.ImportFrom
+                for s in stmt.body  # type: ignore[union-attr]
             ):
                 insert_pos = i + 1
             else:
                 break
 
-        groups: Dict[Tuple[int, int], List[Tuple[str, BackportFeature]]] = defaultdict(
-            list,
-        )
-        for fname, feature in scope_assignments.items():
-            groups[feature.min_version].append((fname, feature))
-
-        for version in sorted(groups.keys()):
-            features = groups[version]
-            key = (current, version)
+        blocks = []
+        for version, features in self.config.group_by_version(
+            (feature, (fname, feature)) for fname, feature in scope_assignments.items()
+        ):
+            key = (scope, version)
             if key in self._applied_assignments:
                 continue
-            if self._version_check_exists(current, version, "assignment"):
+            if self._version_check_exists(scope, version, "assignment"):
                 continue
             self._applied_assignments.add(key)
-            block = self._make_assignment_check(version, features, nested=True)
-            new_body.insert(insert_pos, block)
-            insert_pos += 1
+            blocks.append(self._make_assignment_check(version, features, nested=True))
+        new_body[insert_pos:insert_pos] = blocks
+        insert_pos += len(blocks)
 
         if insert_pos > 0:
             return updated_node.with_changes(body=cst.IndentedBlock(body=new_body))
@@ -642,52 +857,42 @@ class _BackportTransformer(cst.CSTTransformer):
         original_node: cst.SimpleStatementLine,
         updated_node: cst.SimpleStatementLine,
     ):
-        if len(updated_node.body) != 1:
+        if len(original_node.body) != 1:
             return updated_node
-        stmt = updated_node.body[0]
-        if not isinstance(stmt, cst.ImportFrom):
-            return updated_node
-        if not _module_matches(stmt.module, self.config.source_module):
+        info = self._nested_imports.get(id(original_node.body[0]))
+        if info is None:
             return updated_node
         if self._is_inside_version_check():
             return updated_node
 
-        current_names = self._extract_import_names(stmt)
-        transformable: List[BackportFeature] = []
-        actual_scope: Tuple[cst.CSTNode, ...] = ()
-        for info in self.import_statements:
-            if not info.scope_path:
-                continue
-            for feature in info.features:
-                if feature.name in current_names:
-                    transformable.append(feature)
-                    actual_scope = info.scope_path
-        if not transformable:
-            return updated_node
-
-        transformable_names = {f.name for f in transformable}
-        if current_names != transformable_names:
+        stmt = cst.ensure_type(updated_node.body[0], cst.ImportFrom)
+        transformable = info.features
+        actual_scope = info.scope_path
+        # The info's aliases are keyed by exactly the transformable names, so
+        # compare against those rather than building another set.
+        if self._extract_import_names(stmt) != info.aliases.keys():
             return updated_node
 
-        feature_aliases = self._extract_feature_aliases(stmt)
+        feature_aliases = info.aliases
         # Build usages grouped by version.
-        version_groups: Dict[Tuple[int, int], List[_UsageInfo]] = defaultdict(list)
-        for feature in transformable:
-            alias = feature_aliases.get(feature.name, feature.name)
-            version_groups[feature.min_version].append(
+        version_groups = self.config.group_by_version(
+            (
+                feature,
                 _UsageInfo(
                     feature=feature,
-                    alias=alias,
+                    alias=feature_aliases[feature.name],
                     import_style="from_source",
                     scope_path=actual_scope,
                 ),
             )
+            for feature in transformable
+        )
         out = []
-        for version in sorted(version_groups.keys()):
+        for version, usages in version_groups:
             out.append(
                 self._make_conditional_import_check(
                     version,
-                    version_groups[version],
+                    usages,
                     nested=bool(actual_scope),
                 ),
             )
@@ -697,57 +902,27 @@ class _BackportTransformer(cst.CSTTransformer):
 
     @staticmethod
     def _extract_import_names(import_node: cst.ImportFrom) -> set:
-        if isinstance(import_node.names, cst.ImportStar):
+        names = import_node.names
+        if type(names) is cst.ImportStar:
             return {"*"}
-        names = (
-            import_node.names
-            if isinstance(import_node.names, (list, tuple))
-            else [import_node.names]
-        )
-        out = set()
-        for n in names:
-            if isinstance(n, cst.ImportAlias):
-                out.add(n.name.value)
-        return out
-
-    @staticmethod
-    def _extract_feature_aliases(import_node: cst.ImportFrom) -> dict:
-        aliases: Dict[str, str] = {}
-        if isinstance(import_node.names, cst.ImportStar):
-            return aliases
-        names = (
-            import_node.names
-            if isinstance(import_node.names, (list, tuple))
-            else [import_node.names]
-        )
-        for n in names:
-            if isinstance(n, cst.ImportAlias):
-                fname = n.name.value
-                alias = n.asname.name.value if n.asname else fname
-                aliases[fname] = alias
-        return aliases
+        return {n.name.value for n in names}  # type: ignore[union-attr]
 
     # -- output construction -----------------------------------------------
+    # A check only depends on the config, the version, the names involved
+    # and whether it is nested, and modules often need the same ones. So each
+    # (immutable) check is built once per signature.
 
+    @staticmethod
     def _version_condition(
-        self,
         version: Tuple[int, int],
         op: cst.BaseCompOp,
     ) -> cst.Comparison:
         return cst.Comparison(
-            left=cst.Attribute(
-                value=cst.Name("sys"),
-                attr=cst.Name("version_info"),
-            ),
+            left=_SYS_VERSION_INFO,
             comparisons=[
                 cst.ComparisonTarget(
                     operator=op,
-                    comparator=cst.Tuple(
-                        [
-                            cst.Element(cst.Integer(str(version[0]))),
-                            cst.Element(cst.Integer(str(version[1]))),
-                        ],
-                    ),
+                    comparator=_version_tuple(version),
                 ),
             ],
         )
@@ -757,19 +932,39 @@ class _BackportTransformer(cst.CSTTransformer):
         version: Tuple[int, int],
         usages: List[_UsageInfo],
         nested: bool,
+    ) -> cst.If:
+        return self._conditional_import_check(
+            self.config.source_module,
+            self.config.fallback_module,
+            version,
+            tuple(
+                (u.feature.name, u.feature.effective_fallback_name, u.alias)
+                for u in usages
+            ),
+            nested,
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _conditional_import_check(
+        source: str,
+        fallback: str,
+        version: Tuple[int, int],
+        names: Tuple[Tuple[str, str, str], ...],
+        nested: bool,
     ) -> cst.If:
         # ``if sys.version_info >= (X, Y): from source import ... else: from fallback import ...``
-        source_aliases = [self._import_alias(u.feature.name, u.alias) for u in usages]
+        import_alias = _BackportTransformer._import_alias
+        source_aliases = [import_alias(name, alias) for name, _, alias in names]
         fallback_aliases = [
-            self._import_alias(u.feature.effective_fallback_name, u.alias)
-            for u in usages
+            import_alias(fallback_name, alias) for _, fallback_name, alias in names
         ]
         if_body = cst.IndentedBlock(
             [
                 cst.SimpleStatementLine(
                     [
                         cst.ImportFrom(
-                            module=_dotted_to_cst(self.config.source_module),
+                            module=_dotted_to_cst(source),
                             names=source_aliases,
                         ),
                     ],
@@ -781,7 +976,7 @@ class _BackportTransformer(cst.CSTTransformer):
                 cst.SimpleStatementLine(
                     [
                         cst.ImportFrom(
-                            module=_dotted_to_cst(self.config.fallback_module),
+                            module=_dotted_to_cst(fallback),
                             names=fallback_aliases,
                         ),
                     ],
@@ -789,10 +984,10 @@ class _BackportTransformer(cst.CSTTransformer):
             ],
         )
         return cst.If(
-            test=self._version_condition(version, cst.GreaterThanEqual()),
+            test=_BackportTransformer._version_condition(version, _GREATER_THAN_EQUAL),
             body=if_body,
             orelse=cst.Else(body=else_body),
-            leading_lines=[] if nested else [cst.EmptyLine()],
+            leading_lines=_NESTED_LEADING_LINES if nested else _MODULE_LEADING_LINES,
         )
 
     def _make_assignment_check(
@@ -800,46 +995,57 @@ class _BackportTransformer(cst.CSTTransformer):
         version: Tuple[int, int],
         features: List[Tuple[str, BackportFeature]],
         nested: bool,
+    ) -> cst.If:
+        return self._assignment_check(
+            self.config.source_module,
+            self.config.fallback_module,
+            version,
+            tuple(
+                (fname, feature.effective_fallback_name) for fname, feature in features
+            ),
+            nested,
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _assignment_check(
+        source: str,
+        fallback: str,
+        version: Tuple[int, int],
+        names: Tuple[Tuple[str, str], ...],
+        nested: bool,
     ) -> cst.If:
         # ``if sys.version_info < (X, Y): import fallback; source.X = fallback.X``
         statements: List[cst.SimpleStatementLine] = [
             cst.SimpleStatementLine(
-                [
-                    cst.Import(
-                        [cst.ImportAlias(_dotted_to_cst(self.config.fallback_module))],
-                    ),
-                ],
+                [cst.Import([cst.ImportAlias(_dotted_to_cst(fallback))])],
             ),
         ]
-        for fname, feature in features:
+        for fname, fallback_name in names:
             statements.append(
                 cst.SimpleStatementLine(
                     [
                         cst.Assign(
                             targets=[
-                                cst.AssignTarget(
-                                    cst.Attribute(
-                                        value=_dotted_to_cst(self.config.source_module),
-                                        attr=cst.Name(fname),
-                                    ),
-                                ),
+                                cst.AssignTarget(_module_attribute(source, fname)),
                             ],
-                            value=cst.Attribute(
-                                value=_dotted_to_cst(self.config.fallback_module),
-                                attr=cst.Name(feature.effective_fallback_name),
-                            ),
+                            value=_module_attribute(fallback, fallback_name),
                         ),
                     ],
                 ),
             )
         return cst.If(
-            test=self._version_condition(version, cst.LessThan()),
+            test=_BackportTransformer._version_condition(version, _LESS_THAN),
             body=cst.IndentedBlock(statements),
-            leading_lines=[] if nested else [cst.EmptyLine()],
+            leading_lines=_NESTED_LEADING_LINES if nested else _MODULE_LEADING_LINES,
         )
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def _import_alias(name: str, alias: str) -> cst.ImportAlias:
+        # Shared between checks (and between the two branches of a check):
+        # nodes are immutable, and the separating commas are added by the
+        # enclosing ImportFrom when the code is generated.
         if name == alias:
             return cst.ImportAlias(name=cst.Name(name))
         return cst.ImportAlias(
@@ -858,14 +1064,21 @@ def transform_module(module: cst.Module, config: BackportConfig) -> cst.Module:
     analyzer = _AnalysisVisitor(config)
     module.visit(analyzer)
     transformer = _BackportTransformer(analyzer)
+    if not transformer.needs_traversal():
+        # Everything happens in leave_Module, so skip walking (and
+        # rebuilding) the rest of the tree.
+        return transformer.leave_Module(module, module)
     return module.visit(transformer)
 
 
 def transform(source_code: str, config: BackportConfig) -> str:
     """Source-in / source-out form, used directly by tests."""
-    module = cst.parse_module(source_code)
-    transformed = transform_module(module, config)
-    code = transformed.code
+    # Every import or use of the source module names (at least) its top-level
+    # package, so a source without it can skip the parse and traversal.
+    if config.source_module.partition(".")[0] in source_code:
+        code = transform_module(cst.parse_module(source_code), config).code
+    else:
+        code = source_code
     # FIXME: we should not be producing empty lines with whitespace in the
     # first place — same workaround as the original typing_extensions impl.
     code = "\n".join(line if line.strip() else "" for line in code.splitlines()) + "\n"
@@ -0,0 +1,129 @@
+"""Run several CST transformers over a module in a single traversal.
+
+Each ``module.visit(...)`` walks every node and rebuilds the tree, so chaining
+independent transformers multiplies that cost. :class:`CompositeTransformer`
+forwards every visit/leave event to its children in order, threading the
+updated node from one child to the next, so the tree is walked only once.
+
+Only transformers which are happy to see each other's output node-by-node can
+be combined: if a child replaces a node with a sentinel (``FlattenSentinel``
+or ``RemovalSentinel``), the remaining children do not see that node. Passes
+which need to analyse the whole module up-front (e.g. the backport engine)
+must still run separately.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, Dict, Sequence, Tuple, Type, Union
+
+import libcst as cst
+
+_Hook = Callable[..., Any]
+
+
+def _overrides(transformer: cst.CSTTransformer, hook: str) -> bool:
+    # CSTTransformer defines a no-op for every hook, so a child only handles
+    # an event if its class replaces that no-op.
+    base_hook = getattr(cst.CSTTransformer, hook, None)
+    return getattr(type(transformer), hook, None) is not base_hook
+
+
+class CompositeTransformer(cst.CSTTransformer):
+    def __init__(self, transformers: Sequence[cst.CSTTransformer]) -> None:
+        self.transformers = tuple(transformers)
+        # Children that returned False from ``on_visit``, mapped to the node
+        # whose subtree they asked to skip.
+        self._skipping: Dict[cst.CSTTransformer, cst.CSTNode] = {}
+        # Per node type (and attribute), the children with a hook for it and
+        # the hook to call. Most children only handle a few node types, so
+        # this saves looking up every child's ``visit_<Type>`` (and so on)
+        # for every node.
+        self._hooks: Dict[
+            Tuple[str, Type[cst.CSTNode], str],
+            Tuple[Tuple[cst.CSTTransformer, _Hook], ...],
+        ] = {}
+        super().__init__()
+
+    def _find_hooks(
+        self,
+        kind: str,
+        node_type: Type[cst.CSTNode],
+        attribute: str = "",
+    ) -> Tuple[Tuple[cst.CSTTransformer, _Hook], ...]:
+        key = (kind, node_type, attribute)
+        hooks = self._hooks.get(key)
+        if hooks is not None:
+            return hooks
+
+        name = f"{kind}_{node_type.__name__}"
+        generic = "on_" + kind
+        if attribute:
+            name += "_" + attribute
+            generic += "_attribute"
+        found = []
+        for transformer in self.transformers:
+            if _overrides(transformer, generic):
+                # The child does its own dispatch, so give it every event.
+                hook = getattr(transformer, generic)
+                if attribute:
+                    hook = functools.partial(hook, attribute=attribute)
+            elif _overrides(transformer, name):
+                hook = getattr(transformer, name)
+            else:
+                continue
+            found.append((transformer, hook))
+        hooks = self._hooks[key] = tuple(found)
+        return hooks
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        skipping = self._skipping
+        for transformer, visit in self._find_hooks("visit", type(node)):
+            if skipping and transformer in skipping:
+                continue
+            if visit(node) is False:
+                skipping[transformer] = node
+        return True
+
+    def on_leave(  # type: ignore[override]
+        self,
+        original_node: cst.CSTNode,
+        updated_node: cst.CSTNode,
+    ) -> Union[cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel]:
+        skipping = self._skipping
+        result: Union[cst.CSTNode, cst.RemovalSentinel, cst.FlattenSentinel]
+        result = updated_node
+        for transformer, leave in self._find_hooks("leave", type(original_node)):
+            if skipping:
+                skipped_node = skipping.get(transformer)
+                if skipped_node is not None and skipped_node is not original_node:
+                    continue
+            if not isinstance(result, cst.CSTNode):
+                # A sentinel: later children don't get to see this node.
+                break
+            result = leave(original_node, result)
+        if skipping:
+            # The children skipping this node's subtree (which still left it,
+            # above) resume with its siblings.
+            for transformer, skipped_node in list(skipping.items()):
+                if skipped_node is original_node:
+                    del skipping[transformer]
+        return result
+
+    def _forward_attribute(
+        self,
+        kind: str,
+        node: cst.CSTNode,
+        attribute: str,
+    ) -> None:
+        skipping = self._skipping
+        for transformer, hook in self._find_hooks(kind, type(node), attribute):
+            if skipping and transformer in skipping:
+                continue
+            hook(node)
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        self._forward_attribute("visit", node, attribute)
+
+    def on_leave_attribute(self, original_node: cst.CSTNode, attribute: str) -> None:
+        self._forward_attribute("leave", original_node, attribute)
@@ -3,6 +3,14 @@ from __future__ import annotations
 from typing import List
 
 import libcst as cst
+import libcst.matchers as m
+
+_DATACLASS_NAME = m.Name("dataclass")
+_DATACLASS_CALL = m.Call(func=_DATACLASS_NAME)
+_DATACLASS_DECO = m.Decorator(decorator=_DATACLASS_NAME | _DATACLASS_CALL)
+_MATCH_ARGS_FALSE_ARG = m.Arg(keyword=m.Name("match_args"), value=m.Name("False"))
+_MATCH_ARGS_KEYWORD_ARG = m.Arg(keyword=m.Name("match_args"))
+_MATCH_ARGS_NAME = cst.Name("__match_args__")
 
 
 class DataclassTransformer(cst.CSTTransformer):
@@ -54,23 +62,23 @@ class DataclassTransformer(cst.CSTTransformer):
         if not self._has_dataclass_decorator(class_def):
             return class_def, False
 
+        field_names, has_match_args = self._scan_class_body(class_def)
+
         # Check if match_args=False is specified
         if self._has_match_args_false(class_def):
             # Remove match_args=False parameter and mark for deletion
             modified_class = self._remove_match_args_parameter(class_def)
             # Only need deletion if __match_args__ wasn't explicitly defined
-            needs_deletion = not self._has_match_args_attribute(class_def)
-            return modified_class, needs_deletion
+            return modified_class, not has_match_args
 
         # Check if __match_args__ is already defined
-        if self._has_match_args_attribute(class_def):
+        if has_match_args:
             return class_def, False
 
         # Add __match_args__ for regular dataclasses
-        field_names = self._extract_field_names(class_def)
         if field_names:
             match_args_stmt = self._create_match_args_statement(field_names)
-            new_body = list(class_def.body.body) + [match_args_stmt]
+            new_body = tuple(class_def.body.body) + (match_args_stmt,)
             new_body_node = class_def.body.with_changes(body=new_body)
             modified_class = class_def.with_changes(body=new_body_node)
             return modified_class, False
@@ -84,7 +92,7 @@ class DataclassTransformer(cst.CSTTransformer):
         del_stmt = cst.Del(
             target=cst.Attribute(
                 value=cst.Name(class_name),
-                attr=cst.Name("__match_args__"),
+                attr=_MATCH_ARGS_NAME,
             ),
         )
 
@@ -102,80 +110,47 @@ class DataclassTransformer(cst.CSTTransformer):
 
     def _has_dataclass_decorator(self, class_def: cst.ClassDef) -> bool:
         """Check if class has @dataclass decorator."""
-        for decorator in class_def.decorators:
-            if isinstance(decorator.decorator, cst.Name):
-                if decorator.decorator.value == "dataclass":
-                    return True
-            elif isinstance(decorator.decorator, cst.Call):
-                if (
-                    isinstance(decorator.decorator.func, cst.Name)
-                    and decorator.decorator.func.value == "dataclass"
-                ):
-                    return True
-        return False
+        return any(m.matches(d, _DATACLASS_DECO) for d in class_def.decorators)
 
     def _has_match_args_false(self, class_def: cst.ClassDef) -> bool:
         """Check if @dataclass has match_args=False."""
         for decorator in class_def.decorators:
-            if isinstance(decorator.decorator, cst.Call):
-                if (
-                    isinstance(decorator.decorator.func, cst.Name)
-                    and decorator.decorator.func.value == "dataclass"
-                ):
-                    # Check for match_args=False in arguments
-                    for arg in decorator.decorator.args:
-                        if (
-                            isinstance(arg, cst.Arg)
-                            and isinstance(arg.keyword, cst.Name)
-                            and arg.keyword.value == "match_args"
-                            and isinstance(arg.value, cst.Name)
-                            and arg.value.value == "False"
-                        ):
-                            return True
-        return False
-
-    def _has_match_args_attribute(self, class_def: cst.ClassDef) -> bool:
-        """Check if class already has __match_args__ attribute."""
-        for stmt in class_def.body.body:
-            if isinstance(stmt, cst.SimpleStatementLine):
-                for inner_stmt in stmt.body:
-                    if isinstance(inner_stmt, cst.Assign):
-                        for target in inner_stmt.targets:
-                            if (
-                                isinstance(target.target, cst.Name)
-                                and target.target.value == "__match_args__"
-                            ):
-                                return True
-            elif isinstance(stmt, cst.AnnAssign):
-                if (
-                    isinstance(stmt.target, cst.Name)
-                    and stmt.target.value == "__match_args__"
+            if m.matches(decorator.decorator, _DATACLASS_CALL):
+                if any(
+                    m.matches(arg, _MATCH_ARGS_FALSE_ARG)
+                    for arg in decorator.decorator.args  # type: ignore[attr-defined]
                 ):
                     return True
         return False
 
-    def _extract_field_names(self, class_def: cst.ClassDef) -> List[str]:
-        """Extract field names from dataclass."""
-        field_names = []
+    def _scan_class_body(self, class_def: cst.ClassDef) -> tuple[List[str], bool]:
+        """Find the field names of a class, and whether it sets __match_args__.
+
+        Both come from the class's simple statements, so are gathered in one
+        pass over the body.
+        """
+        field_names: List[str] = []
+        has_match_args = False
 
         for stmt in class_def.body.body:
-            if isinstance(stmt, cst.AnnAssign):
-                # Annotated assignment: x: int or x: int = 5
-                if isinstance(stmt.target, cst.Name):
-                    field_names.append(stmt.target.value)
-            elif isinstance(stmt, cst.SimpleStatementLine):
-                for inner_stmt in stmt.body:
-                    if isinstance(inner_stmt, cst.Assign):
-                        # Regular assignment: x = 5 (less common in dataclasses)
-                        for target in inner_stmt.targets:
-                            if isinstance(target.target, cst.Name):
-                                field_names.append(target.target.value)
-                    elif isinstance(inner_stmt, cst.AnnAssign):
-                        # Annotated assignment in simple statement line
-                        if isinstance(inner_stmt.target, cst.Name):
-                            field_names.append(inner_stmt.target.value)
-
-        return field_names
+            if not isinstance(stmt, cst.SimpleStatementLine):
+                continue
+            for inner_stmt in stmt.body:
+                if isinstance(inner_stmt, cst.AnnAssign):
+                    # Annotated assignment: x: int or x: int = 5
+                    target = inner_stmt.target
+                    if isinstance(target, cst.Name):
+                        field_names.append(target.value)
+                        has_match_args |= target.value == "__match_args__"
+                elif isinstance(inner_stmt, cst.Assign):
+                    # Regular assignment: x = 5 (less common in dataclasses)
+                    for assign_target in inner_stmt.targets:
+                        target = assign_target.target
+                        if isinstance(target, cst.Name):
+                            field_names.append(target.value)
+                            has_match_args |= target.value == "__match_args__"
+
+        return field_names, has_match_args
 
     def _create_match_args_statement(
         self,
@@ -197,7 +172,7 @@ class DataclassTransformer(cst.CSTTransformer):
 
         # Create assignment: __match_args__ = (...)
         assignment = cst.Assign(
-            targets=[cst.AssignTarget(cst.Name("__match_args__"))],
+            targets=[cst.AssignTarget(_MATCH_ARGS_NAME)],
             value=tuple_value,
         )
 
@@ -208,33 +183,26 @@ class DataclassTransformer(cst.CSTTransformer):
         new_decorators = []
 
         for decorator in class_def.decorators:
-            if isinstance(decorator.decorator, cst.Call):
-                if (
-                    isinstance(decorator.decorator.func, cst.Name)
-                    and decorator.decorator.func.value == "dataclass"
-                ):
-                    # Filter out the match_args parameter
-                    new_args = []
-                    for arg in decorator.decorator.args:
-                        if not (
-                            isinstance(arg, cst.Arg)
-                            and isinstance(arg.keyword, cst.Name)
-                            and arg.keyword.value == "match_args"
-                        ):
-                            new_args.append(arg)
-
-                    # If no args remain, convert back to simple @dataclass
-                    if not new_args:
-                        new_decorator = cst.Decorator(cst.Name("dataclass"))
-                    else:
-                        new_decorator = decorator.with_changes(
-                            decorator=decorator.decorator.with_changes(args=new_args),
-                        )
-
-                    new_decorators.append(new_decorator)
-                else:
-                    new_decorators.append(decorator)
-            else:
+            if not m.matches(decorator.decorator, _DATACLASS_CALL):
                 new_decorators.append(decorator)
+                continue
+
+            # Filter out the match_args parameter
+            call = decorator.decorator
+            new_args = [
+                arg
+                for arg in call.args  # type: ignore[attr-defined]
+                if not m.matches(arg, _MATCH_ARGS_KEYWORD_ARG)
+            ]
+
+            # If no args remain, convert back to simple @dataclass
+            if not new_args:
+                new_decorator = cst.Decorator(cst.Name("dataclass"))
+            else:
+                new_decorator = decorator.with_changes(
+                    decorator=call.with_changes(args=new_args),
+                )
+
+            new_decorators.append(new_decorator)
 
         return class_def.with_changes(decorators=new_decorators)
@@ -1,6 +1,22 @@
 """Utilities for managing imports in transformations."""
 
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import libcst as cst
 
@@ -14,118 +30,221 @@ def _module_dotted_name(node: Optional[cst.BaseExpression]) -> Optional[str]:
         return None
     parts: List[str] = []
     cur: cst.BaseExpression = node
-    while isinstance(cur, cst.Attribute):
-        if not isinstance(cur.attr, cst.Name):
+    while type(cur) is cst.Attribute:
+        if type(cur.attr) is not cst.Name:
             return None
         parts.append(cur.attr.value)
         cur = cur.value
-    if not isinstance(cur, cst.Name):
+    if type(cur) is not cst.Name:
         return None
     parts.append(cur.value)
     return ".".join(reversed(parts))
 
 
+def _is_docstring(stmt: cst.BaseStatement) -> bool:
+    return (
+        type(stmt) is cst.SimpleStatementLine
+        and len(stmt.body) == 1
+        and type(stmt.body[0]) is cst.Expr
+        and type(stmt.body[0].value) is cst.SimpleString
+    )
+
+
+def _is_future_import(substmt: cst.BaseSmallStatement) -> bool:
+    if type(substmt) is not cst.ImportFrom or not substmt.module:
+        return False
+    if type(substmt.module) is cst.Attribute:
+        return substmt.module.attr.value == "__future__"
+    return substmt.module.value == "__future__"
+
+
+# Kinds of statement yielded by _classify_prefix.
+_DOCSTRING = "docstring"
+_FUTURE_IMPORT = "future_import"
+_IMPORT = "import"
+_OTHER = "other"
+
+_IMPORT_KINDS: Dict[type, str] = {
+    cst.Import: _IMPORT,
+    cst.ImportFrom: _IMPORT,
+}
+
+
+def _classify_statement(stmt: cst.BaseStatement) -> str:
+    if type(stmt) is not cst.SimpleStatementLine:
+        return _OTHER
+    kind = _OTHER
+    for substmt in stmt.body:
+        substmt_kind = _IMPORT_KINDS.get(type(substmt))
+        if substmt_kind is None:
+            continue
+        if _is_future_import(substmt):
+            return _FUTURE_IMPORT
+        kind = substmt_kind
+    return kind
+
+
+def _classify_prefix(
+    body: Sequence[cst.BaseStatement],
+) -> Iterator[Tuple[int, str]]:
+    """Yield ``(index, kind)`` for the leading statements of ``body``.
+
+    The docstring and import statements at the top of the module are yielded
+    in turn, followed by the first statement of any other kind (if there is
+    one), after which the generator stops.
+    """
+    start = 0
+    if body and _is_docstring(body[0]):
+        yield 0, _DOCSTRING
+        start = 1
+    for index in range(start, len(body)):
+        kind = _classify_statement(body[index])
+        yield index, kind
+        if kind is _OTHER:
+            return
+
+
+class _ImportPrefix(NamedTuple):
+    """Summary of the docstring and import statements at the top of a module."""
+
+    # After the docstring and any __future__ imports.
+    import_position: int
+    # After all of the leading import statements.
+    post_import_position: int
+    # Modules directly imported (``import X``) by the leading imports.
+    early_direct_imports: FrozenSet[str]
+
+
+def _scan_prefix(body: Sequence[cst.BaseStatement]) -> _ImportPrefix:
+    """Summarise the leading docstring/import statements of ``body``."""
+    import_position = post_import_position = 0
+    in_future_imports = True
+    early_direct_imports: Set[str] = set()
+
+    for index, kind in _classify_prefix(body):
+        if kind is _OTHER:
+            break
+        post_import_position = index + 1
+        if in_future_imports and kind is not _IMPORT:
+            import_position = index + 1
+        else:
+            in_future_imports = False
+        for substmt in cast(cst.SimpleStatementLine, body[index]).body:
+            if type(substmt) is cst.Import:
+                for alias in substmt.names:
+                    module_name = _module_dotted_name(alias.name)
+                    if module_name is not None:
+                        early_direct_imports.add(module_name)
+
+    return _ImportPrefix(
+        import_position,
+        post_import_position,
+        frozenset(early_direct_imports),
+    )
+
+
+def _make_direct_import(module_name: str) -> cst.SimpleStatementLine:
+    """Create ``import <module_name>``, where the name may be dotted."""
+    parts = module_name.split(".")
+    import_node: Union[cst.Name, cst.Attribute] = cst.Name(parts[0])
+    for part in parts[1:]:
+        import_node = cst.Attribute(import_node, cst.Name(part))
+    return cst.SimpleStatementLine(
+        [
+            cst.Import(
+                [
+                    cst.ImportAlias(import_node),
+                ],
+            ),
+        ],
+        trailing_whitespace=cst.TrailingWhitespace(
+            newline=cst.Newline(),
+        ),
+    )
+
+
+# libcst nodes are immutable, so one ``import sys`` statement can be shared.
+_SYS_IMPORT_STMT = _make_direct_import("sys")
+
+
+def _missing_direct_imports(
+    body: Sequence[cst.BaseStatement],
+    module_names: Iterable[str],
+) -> Tuple[Set[str], int]:
+    """Which of ``module_names`` no top-level ``import X`` in ``body`` imports.
+
+    Also returns where new imports go (after the docstring and any
+    ``__future__`` imports), found in the same pass over ``body``. Stops
+    looking once all of the modules have been found past that position.
+    """
+    missing = set(module_names)
+    import_position = 0
+    in_future_imports = True
+    for index, stmt in enumerate(body):
+        if in_future_imports:
+            if index == 0 and _is_docstring(stmt):
+                import_position = 1
+                continue
+            if _classify_statement(stmt) is _FUTURE_IMPORT:
+                import_position = index + 1
+                continue
+            in_future_imports = False
+        if not missing:
+            break
+        if type(stmt) is not cst.SimpleStatementLine:
+            continue
+        for substmt in stmt.body:
+            if type(substmt) is cst.Import:
+                for alias in substmt.names:
+                    missing.discard(_module_dotted_name(alias.name))  # type: ignore[arg-type]
+    return missing, import_position
+
+
 class ImportManager:
     """Helper class for managing automatic imports in transformations."""
 
     def __init__(self):
-        self._required_imports = set()
+        # Insertion ordered, so imports are added in the order first required.
+        self._required_imports: Dict[str, None] = {}
 
     def require_import(self, import_name: str) -> None:
         """Mark an import as required."""
-        self._required_imports.add(import_name)
+        self._required_imports.setdefault(import_name, None)
 
     def apply_imports(self, module: cst.Module) -> cst.Module:
         """Add all required imports to the module."""
         if not self._required_imports:
             return module
 
-        # Find the correct position to insert imports
-        insert_position = self._find_import_position(module.body)
+        # Insert after the docstring and any __future__ imports.
+        insert_position = _scan_prefix(module.body).import_position
 
-        new_stmts = list(module.body)
-        for import_name in sorted(self._required_imports):
-            import_stmt = self._create_import_statement(import_name)
-            new_stmts.insert(insert_position, import_stmt)
-            insert_position += 1
+        imports = tuple(
+            self._create_import_statement(import_name)
+            for import_name in self._required_imports
+        )
+        body = tuple(module.body)
+        new_body = body[:insert_position] + imports + body[insert_position:]
 
-        return module.with_changes(body=tuple(new_stmts))
+        return module.with_changes(body=new_body)
 
     def _create_import_statement(self, import_name: str) -> cst.SimpleStatementLine:
         """Create an import statement for the given import name."""
-        if "." in import_name:
-            # Handle dotted imports like "collections.abc"
-            parts = import_name.split(".")
-            import_node = cst.Name(parts[0])
-            for part in parts[1:]:
-                import_node = cst.Attribute(import_node, cst.Name(part))
-        else:
-            # Simple import like "typing"
-            import_node = cst.Name(import_name)
-
-        return cst.SimpleStatementLine(
-            [
-                cst.Import(
-                    [
-                        cst.ImportAlias(import_node),
-                    ],
-                ),
-            ],
-            trailing_whitespace=cst.TrailingWhitespace(
-                newline=cst.Newline(),
-            ),
-        )
-
-    def _find_import_position(
-        self,
-        body: Tuple[cst.BaseStatement, ...],
-    ) -> int:
-        """Find the correct position to insert imports."""
-        position = 0
-
-        # Skip module docstrings
-        if body and isinstance(body[0], cst.SimpleStatementLine):
-            if (
-                len(body[0].body) == 1
-                and isinstance(body[0].body[0], cst.Expr)
-                and isinstance(body[0].body[0].value, cst.SimpleString)
-            ):
-                position = 1
-
-        # Skip __future__ imports
-        for i in range(position, len(body)):
-            stmt = body[i]
-            if isinstance(stmt, cst.SimpleStatementLine):
-                for substmt in stmt.body:
-                    if (
-                        isinstance(substmt, cst.ImportFrom)
-                        and substmt.module
-                        and isinstance(substmt.module, cst.Attribute)
-                        and substmt.module.attr.value == "__future__"
-                    ):
-                        position = i + 1
-                        break
-                    elif (
-                        isinstance(substmt, cst.ImportFrom)
-                        and substmt.module
-                        and isinstance(substmt.module, cst.Name)
-                        and substmt.module.value == "__future__"
-                    ):
-                        position = i + 1
-                        break
-                else:
-                    # If we didn't find a __future__ import in this statement, stop looking
-                    break
-            else:
-                # If we hit a non-simple statement, stop looking
-                break
-
-        return position
+        return _make_direct_import(import_name)
 
 
 class ImportInfo:
     """Information about an import found in the module."""
 
+    __slots__ = (
+        "module_name",
+        "imported_name",
+        "alias",
+        "stmt_index",
+        "import_index",
+        "effective_name",
+    )
+
     def __init__(
         self,
         module_name: str,
@@ -139,11 +258,8 @@ class ImportInfo:
         self.alias = alias  # e.g., "fi_na_l" if imported as "final as fi_na_l"
         self.stmt_index = stmt_index  # Index in module body
         self.import_index = import_index  # Index within the import statement
-
-    @property
-    def effective_name(self) -> str:
-        """The name used to reference this import in code."""
-        return self.alias if self.alias else self.imported_name
+        # The name used to reference this import in code.
+        self.effective_name = alias if alias else imported_name
 
 
 class EnhancedImportManager:
@@ -151,26 +267,42 @@ class EnhancedImportManager:
 
     def __init__(self):
         self._import_info: Dict[str, List[ImportInfo]] = {}
+        # The first import of each (module, name) pair, for O(1) lookups.
+        self._by_pair: Dict[Tuple[str, str], ImportInfo] = {}
         self._direct_imports: Dict[
             str,
             int,
         ] = {}  # Track direct imports like 'import typing'
+        # Direct imports requested by transformers sharing this manager.
+        self._required_direct_imports: Dict[str, None] = {}
+        # Prefix scans of immutable (tuple) bodies, keyed by id(body). The body
+        # itself is kept alongside so that a recycled id can't give a stale hit.
+        self._prefix_cache: Dict[
+            int,
+            Tuple[Tuple[cst.BaseStatement, ...], _ImportPrefix],
+        ] = {}
 
-    def scan_imports(
-        self,
-        body: Union[Tuple[cst.BaseStatement, ...], List[cst.BaseStatement]],
-    ) -> None:
+    def scan_imports(self, body: Sequence[cst.BaseStatement]) -> None:
         """Scan module body to detect existing imports and their aliases."""
         self._import_info.clear()
+        self._by_pair.clear()
         self._direct_imports.clear()
 
+        dispatch = self._scan_dispatch
         for stmt_idx, stmt in enumerate(body):
-            if isinstance(stmt, cst.SimpleStatementLine):
+            if type(stmt) is cst.SimpleStatementLine:
                 for substmt in stmt.body:
-                    if isinstance(substmt, cst.ImportFrom) and substmt.module:
-                        self._scan_import_from(substmt, stmt_idx)
-                    elif isinstance(substmt, cst.Import):
-                        self._scan_import(substmt, stmt_idx)
+                    handler = dispatch.get(type(substmt))
+                    if handler is not None:
+                        handler(self, substmt, stmt_idx)
+
+    def scan_import_from(self, import_stmt: cst.ImportFrom, stmt_idx: int = -1) -> None:
+        """Record the names imported by a single 'from X import Y' statement.
+
+        For callers which already visit each import, so needn't have the whole
+        body scanned again. ``stmt_idx`` is -1 when the index isn't known.
+        """
+        self._scan_import_from(import_stmt, stmt_idx)
 
     def _scan_import_from(self, import_stmt: cst.ImportFrom, stmt_idx: int) -> None:
         """Scan a 'from X import Y' statement (supports dotted X)."""
@@ -180,10 +312,7 @@ class EnhancedImportManager:
 
         if isinstance(import_stmt.names, (list, tuple)):
             for import_idx, name in enumerate(import_stmt.names):
-                if isinstance(name, cst.ImportAlias) and isinstance(
-                    name.name,
-                    cst.Name,
-                ):
+                if type(name) is cst.ImportAlias and type(name.name) is cst.Name:
                     imported_name = name.name.value
                     alias = name.asname.name.value if name.asname else None
 
@@ -198,6 +327,7 @@ class EnhancedImportManager:
                     if module_name not in self._import_info:
                         self._import_info[module_name] = []
                     self._import_info[module_name].append(info)
+                    self._by_pair.setdefault((module_name, imported_name), info)
 
     def _scan_import(self, import_stmt: cst.Import, stmt_idx: int) -> None:
         """Scan a direct 'import X' statement (supports dotted X)."""
@@ -206,23 +336,23 @@ class EnhancedImportManager:
             if module_name is not None:
                 self._direct_imports[module_name] = stmt_idx
 
+    # Exact node type -> scanner; libcst node classes aren't subclassed. Built
+    # once for the class, rather than with bound methods for every manager.
+    _scan_dispatch: ClassVar[
+        Dict[type, Callable[["EnhancedImportManager", Any, int], None]]
+    ] = {
+        cst.ImportFrom: _scan_import_from,
+        cst.Import: _scan_import,
+    }
+
     def has_import(self, module_name: str, imported_name: str) -> bool:
         """Check if a specific import exists."""
-        if module_name not in self._import_info:
-            return False
-        return any(
-            info.imported_name == imported_name
-            for info in self._import_info[module_name]
-        )
+        return (module_name, imported_name) in self._by_pair
 
     def get_import_alias(self, module_name: str, imported_name: str) -> Optional[str]:
         """Get the alias for an import, or None if not found or no alias."""
-        if module_name not in self._import_info:
-            return None
-        for info in self._import_info[module_name]:
-            if info.imported_name == imported_name:
-                return info.effective_name
-        return None
+        info = self._by_pair.get((module_name, imported_name))
+        return info.effective_name if info else None
 
     def has_direct_import(self, module_name: str) -> bool:
         """Check if a direct import like 'import typing' exists."""
@@ -230,102 +360,172 @@ class EnhancedImportManager:
 
     def remove_from_imports(
         self,
-        body: List[cst.BaseStatement],
+        body: Sequence[cst.BaseStatement],
         module_name: str,
         imported_name: str,
-    ) -> List[cst.BaseStatement]:
-        """Remove a specific import from existing import statements."""
-        if module_name not in self._import_info:
+    ) -> Sequence[cst.BaseStatement]:
+        """Remove a specific import from existing import statements.
+
+        Statements which don't import the name are kept as the same objects,
+        and ``body`` itself is returned if it doesn't import the name.
+        """
+        return self.remove_names_from_imports(body, module_name, [imported_name])
+
+    def remove_names_from_imports(
+        self,
+        body: Sequence[cst.BaseStatement],
+        module_name: str,
+        imported_names: Iterable[str],
+    ) -> Sequence[cst.BaseStatement]:
+        """Like :meth:`remove_from_imports`, for several names at once.
+
+        The body is walked (and each import rewritten) once, however many of
+        the names it imports.
+        """
+        names = frozenset(
+            name for name in imported_names if (module_name, name) in self._by_pair
+        )
+        if not names:
             return body
 
-        new_body = []
-        for stmt in body:
-            if isinstance(stmt, cst.SimpleStatementLine):
+        # ``body`` may have been transformed since it was scanned, so the
+        # recorded statement indices can't be trusted to find the imports.
+        # The statements before the first change are copied in one go, and
+        # only lines with a ``from`` import are looked into.
+        new_body: Optional[List[cst.BaseStatement]] = None
+        for index, stmt in enumerate(body):
+            if type(stmt) is cst.SimpleStatementLine and any(
+                type(substmt) is cst.ImportFrom for substmt in stmt.body
+            ):
                 new_substmts = []
+                changed = False
                 for substmt in stmt.body:
-                    if (
-                        isinstance(substmt, cst.ImportFrom)
-                        and substmt.module is not None
-                        and _module_dotted_name(substmt.module) == module_name
-                    ):
-                        # Filter out the specific import
-                        if isinstance(substmt.names, (list, tuple)):
-                            new_names = []
-                            for name in substmt.names:
-                                if (
-                                    isinstance(name, cst.ImportAlias)
-                                    and isinstance(name.name, cst.Name)
-                                    and name.name.value != imported_name
-                                ):
-                                    new_names.append(name)
-
-                            # Only keep the import if there are other names
-                            if new_names:
-                                new_substmt = substmt.with_changes(names=new_names)
-                                new_substmts.append(new_substmt)
-                        else:
-                            # Single name import - keep if not the target
-                            if not (
-                                isinstance(substmt.names, cst.ImportAlias)
-                                and isinstance(substmt.names.name, cst.Name)
-                                and substmt.names.name.value == imported_name
-                            ):
-                                new_substmts.append(substmt)
-                    else:
-                        new_substmts.append(substmt)
-
-                if new_substmts:
-                    new_body.append(stmt.with_changes(body=new_substmts))
-            else:
+                    new_substmt = self._remove_from_import(
+                        substmt,
+                        module_name,
+                        names,
+                    )
+                    changed = changed or new_substmt is not substmt
+                    if new_substmt is not None:
+                        new_substmts.append(new_substmt)
+                if changed:
+                    if new_body is None:
+                        new_body = list(body[:index])
+                    if new_substmts:
+                        new_body.append(stmt.with_changes(body=new_substmts))
+                    continue
+            if new_body is not None:
                 new_body.append(stmt)
 
-        return new_body
+        return body if new_body is None else new_body
+
+    def _remove_from_import(
+        self,
+        substmt: cst.BaseSmallStatement,
+        module_name: str,
+        imported_names: FrozenSet[str],
+    ) -> Optional[cst.BaseSmallStatement]:
+        """Remove ``imported_names`` from ``substmt`` if it imports from ``module_name``.
+
+        Returns ``None`` if nothing is left of the statement.
+        """
+        if not (
+            type(substmt) is cst.ImportFrom
+            and substmt.module is not None
+            and _module_dotted_name(substmt.module) == module_name
+        ):
+            return substmt
+        if not isinstance(substmt.names, (list, tuple)):
+            # ``from module import *``
+            return substmt
+
+        new_names = [
+            name
+            for name in substmt.names
+            if type(name) is cst.ImportAlias
+            and type(name.name) is cst.Name
+            and name.name.value not in imported_names
+        ]
+        if len(new_names) == len(substmt.names):
+            return substmt
+        # Only keep the import if there are other names
+        if not new_names:
+            return None
+        if (
+            substmt.lpar is None
+            and new_names[-1].comma is not cst.MaybeSentinel.DEFAULT
+        ):
+            # The last name was removed: don't leave a dangling comma, which
+            # is a syntax error without parentheses.
+            new_names[-1] = new_names[-1].with_changes(comma=cst.MaybeSentinel.DEFAULT)
+        return substmt.with_changes(names=new_names)
 
     def ensure_sys_import(
         self,
-        body: List[cst.BaseStatement],
-    ) -> List[cst.BaseStatement]:
+        body: Sequence[cst.BaseStatement],
+    ) -> Sequence[cst.BaseStatement]:
         """Ensure sys is imported early in the module."""
-        # Check if sys is imported early (before non-import statements)
-        if not self._has_early_direct_import(body, "sys"):
-            # Add sys import at the appropriate position
-            insert_position = self.find_import_position(body)
-            import_stmt = self._create_direct_import("sys")
-            body.insert(insert_position, import_stmt)
-
-        return body
+        return self.ensure_early_direct_imports(body, ["sys"])
 
-    def _has_early_direct_import(
+    def ensure_early_direct_import(
         self,
-        body: List[cst.BaseStatement],
+        body: Sequence[cst.BaseStatement],
         module_name: str,
-    ) -> bool:
-        """Check if a direct import exists early in the module (before non-import statements)."""
-        for stmt in body:
-            if isinstance(stmt, cst.SimpleStatementLine):
-                # Check if this is an import statement
-                has_imports = any(
-                    isinstance(substmt, (cst.Import, cst.ImportFrom))
-                    for substmt in stmt.body
-                )
-
-                if has_imports:
-                    # Check if this statement contains the direct import we're looking for
-                    for substmt in stmt.body:
-                        if isinstance(substmt, cst.Import) and any(
-                            isinstance(alias.name, cst.Name)
-                            and alias.name.value == module_name
-                            for alias in substmt.names
-                        ):
-                            return True
-                else:
-                    # Hit non-import statement, stop looking
-                    break
-            else:
-                # Hit non-simple statement, stop looking
-                break
+    ) -> Sequence[cst.BaseStatement]:
+        """Ensure ``import <module_name>`` is among the module's leading imports.
 
-        return False
+        Unlike :meth:`ensure_direct_import`, an import of the module further
+        down the module doesn't count, since code before it may need it.
+        """
+        return self.ensure_early_direct_imports(body, [module_name])
+
+    def ensure_early_direct_imports(
+        self,
+        body: Sequence[cst.BaseStatement],
+        module_names: Sequence[str],
+    ) -> Sequence[cst.BaseStatement]:
+        """Like :meth:`ensure_early_direct_import`, for several modules at once.
+
+        The leading imports are scanned once, and any missing imports are
+        added together, in the given order.
+        """
+        prefix = self._scan_prefix(body)
+        missing_names = [
+            module_name
+            for module_name in module_names
+            if module_name not in prefix.early_direct_imports
+        ]
+        if not missing_names:
+            return body
+        insert_position = prefix.import_position
+        new_body = (
+            *body[:insert_position],
+            *(self._create_direct_import(name) for name in missing_names),
+            *body[insert_position:],
+        )
+        # The new imports just extend the leading imports, so the new body's
+        # prefix is known without scanning it again (e.g. when the caller
+        # goes on to find the post-import position).
+        self._prefix_cache[id(new_body)] = (
+            new_body,
+            prefix._replace(
+                post_import_position=(prefix.post_import_position + len(missing_names)),
+                early_direct_imports=(prefix.early_direct_imports.union(missing_names)),
+            ),
+        )
+        return new_body
+
+    def _scan_prefix(self, body: Sequence[cst.BaseStatement]) -> _ImportPrefix:
+        """Scan the leading imports of ``body``, reusing earlier scans of it."""
+        if not isinstance(body, tuple):
+            # Lists may be mutated between calls, so are never cached.
+            return _scan_prefix(body)
+        cached = self._prefix_cache.get(id(body))
+        if cached is not None and cached[0] is body:
+            return cached[1]
+        prefix = _scan_prefix(body)
+        self._prefix_cache[id(body)] = (body, prefix)
+        return prefix
 
     def ensure_direct_import(
         self,
@@ -337,97 +537,55 @@ class EnhancedImportManager:
             # Add import at the appropriate position
             insert_position = self.find_import_position(body)
             import_stmt = self._create_direct_import(module_name)
-            body.insert(insert_position, import_stmt)
+            body = body[:insert_position] + [import_stmt] + body[insert_position:]
 
         return body
 
+    def require_direct_import(self, module_name: str) -> None:
+        """Mark a direct import like 'import typing' as required."""
+        self._required_direct_imports[module_name] = None
+
+    def apply_direct_imports(self, module: cst.Module) -> cst.Module:
+        """Add all required direct imports to the module.
+
+        The requirements are cleared once applied, so transformers sharing a
+        manager only inject each import once.
+        """
+        if not self._required_direct_imports:
+            return module
+
+        body = tuple(module.body)
+        missing, insert_position = _missing_direct_imports(
+            body,
+            self._required_direct_imports,
+        )
+        # Each import is placed at the front of the import block in turn, so
+        # the later requirements come first.
+        imports = tuple(
+            self._create_direct_import(module_name)
+            for module_name in reversed(self._required_direct_imports)
+            if module_name in missing
+        )
+        self._required_direct_imports.clear()
+        if not imports:
+            return module
+
+        new_body = body[:insert_position] + imports + body[insert_position:]
+        return module.with_changes(body=new_body)
+
     def _create_direct_import(self, module_name: str) -> cst.SimpleStatementLine:
         """Create a direct import statement like 'import typing'."""
-        return cst.SimpleStatementLine(
-            [
-                cst.Import(
-                    [
-                        cst.ImportAlias(
-                            cst.Name(module_name),
-                        ),
-                    ],
-                ),
-            ],
-            trailing_whitespace=cst.TrailingWhitespace(
-                newline=cst.Newline(),
-            ),
-        )
+        if module_name == "sys":
+            return _SYS_IMPORT_STMT
+        return _make_direct_import(module_name)
 
     def find_import_position(self, body: List[cst.BaseStatement]) -> int:
         """Find the correct position to insert imports (after __future__ imports)."""
-        position = 0
-
-        # Skip module docstrings
-        if body and isinstance(body[0], cst.SimpleStatementLine):
-            if (
-                len(body[0].body) == 1
-                and isinstance(body[0].body[0], cst.Expr)
-                and isinstance(body[0].body[0].value, cst.SimpleString)
-            ):
-                position = 1
+        return self._scan_prefix(body).import_position
 
-        # Skip __future__ imports
-        for i in range(position, len(body)):
-            stmt = body[i]
-            if isinstance(stmt, cst.SimpleStatementLine):
-                for substmt in stmt.body:
-                    if (
-                        isinstance(substmt, cst.ImportFrom)
-                        and substmt.module
-                        and isinstance(substmt.module, cst.Attribute)
-                        and substmt.module.attr.value == "__future__"
-                    ):
-                        position = i + 1
-                        break
-                    elif (
-                        isinstance(substmt, cst.ImportFrom)
-                        and substmt.module
-                        and isinstance(substmt.module, cst.Name)
-                        and substmt.module.value == "__future__"
-                    ):
-                        position = i + 1
-                        break
-                else:
-                    break
-            else:
-                break
-
-        return position
-
-    def find_post_import_position(self, body: List[cst.BaseStatement]) -> int:
+    def find_post_import_position(self, body: Sequence[cst.BaseStatement]) -> int:
         """Find the position after all imports (for adding conditional blocks)."""
-        position = 0
-
-        # Skip module docstrings
-        if body and isinstance(body[0], cst.SimpleStatementLine):
-            if (
-                len(body[0].body) == 1
-                and isinstance(body[0].body[0], cst.Expr)
-                and isinstance(body[0].body[0].value, cst.SimpleString)
-            ):
-                position = 1
-
-        # Skip all imports
-        for i in range(position, len(body)):
-            stmt = body[i]
-            if isinstance(stmt, cst.SimpleStatementLine):
-                # If this statement contains any imports, skip it
-                if any(
-                    isinstance(substmt, (cst.Import, cst.ImportFrom))
-                    for substmt in stmt.body
-                ):
-                    position = i + 1
-                else:
-                    break
-            else:
-                break
-
-        return position
+        return self._scan_prefix(body).post_import_position
 
     def create_conditional_import(
         self,
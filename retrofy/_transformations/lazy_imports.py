@@ -619,10 +619,10 @@ def _wrap_lazy_reads(
     source: str,
     lazy_names: list[str],
     helpers: _HelperNames,
-) -> tuple[str, bool]:
+) -> tuple[cst.Module, bool]:
     """Wrap every read of a lazy-bound name with ``helpers.reify(name)``.
 
-    Returns the rewritten source plus a flag — ``True`` iff at least
+    Returns the rewritten module plus a flag — ``True`` iff at least
     one read was actually wrapped. The flag lets Phase 3 skip the
     ``reify`` import when the lazy bindings are declared but never
     read (uncommon but possible).
@@ -636,12 +636,14 @@ def _wrap_lazy_reads(
     ``if TYPE_CHECKING: <clean stub> / else: <wrapped>`` pair, giving
     static checkers a clean signature to type-check against.
     """
-    if not lazy_names:
-        return source, False
     module = cst.parse_module(source)
-    wrapper = cst.metadata.MetadataWrapper(module)
+    if not lazy_names:
+        return module, False
+    # The module was just parsed, so nothing else holds (or shares) its
+    # nodes and the wrapper's defensive deep copy can be skipped.
+    wrapper = cst.metadata.MetadataWrapper(module, unsafe_skip_copy=True)
     transformer = _ReifyWrappingTransformer(set(lazy_names), helpers.reify)
-    rewritten = wrapper.visit(transformer).code
+    rewritten = wrapper.visit(transformer)
     return rewritten, bool(transformer._targets)
 
 
@@ -806,21 +808,6 @@ def _build_type_checking_pair(
     )
 
 
-def _apply_type_checking_duplication(
-    source: str,
-    helpers: _HelperNames,
-) -> str:
-    """Reparse *source* and apply :func:`_duplicate_annotated_constructs`.
-
-    Convenience wrapper for :func:`transform_lazy_imports` — phase 2b
-    is a CST-level pass, but the surrounding phases speak source
-    strings, so we materialise the CST here.
-    """
-    module = cst.parse_module(source)
-    module = _duplicate_annotated_constructs(module, helpers)
-    return module.code
-
-
 def _duplicate_annotated_constructs(
     module: cst.Module,
     helpers: _HelperNames,
@@ -1101,10 +1088,10 @@ class _RewritePlaceholderToTyping(cst.CSTTransformer):
 
 
 def _inject_runtime_import(
-    source: str,
+    module: cst.Module,
     helpers: _HelperNames,
     used: set[str],
-) -> str:
+) -> cst.Module:
     """Insert the runtime-import statements after the module's preamble.
 
     The preamble is the optional docstring plus any
@@ -1125,9 +1112,7 @@ def _inject_runtime_import(
       module.
     """
     if not used:
-        return source
-
-    module = cst.parse_module(source)
+        return module
 
     # Decide whether emitted blocks reference plain ``typing`` or the
     # mangled ``__lazy_typing__`` alias. Plain works whenever
@@ -1176,7 +1161,7 @@ def _inject_runtime_import(
             injected[0] = injected[0].with_changes(leading_lines=leading)
             body[insert_at] = following.with_changes(leading_lines=())
     body[insert_at:insert_at] = injected
-    return module.with_changes(body=tuple(body)).code
+    return module.with_changes(body=tuple(body))
 
 
 # ---------------------------------------------------------------------------
@@ -1210,8 +1195,9 @@ def transform_lazy_imports(source: str) -> str:
     stripped, lazy_names, used = _strip_lazy_syntax(source, helpers)
     if not lazy_names:
         return source
+    # The remaining phases work on one CST, which is only serialised once.
     wrapped, reify_used = _wrap_lazy_reads(stripped, lazy_names, helpers)
     if reify_used:
         used.add("reify")
-        wrapped = _apply_type_checking_duplication(wrapped, helpers)
-    return _inject_runtime_import(wrapped, helpers, used)
+        wrapped = _duplicate_annotated_constructs(wrapped, helpers)
+    return _inject_runtime_import(wrapped, helpers, used).code
@@ -14,6 +14,8 @@ Thin configuration wrappers over :mod:`retrofy._transformations._backport_engine
 
 from __future__ import annotations
 
+from typing import Collection
+
 import libcst as cst
 
 from ._backport_engine import BackportConfig, BackportFeature, transform_module
@@ -68,7 +70,17 @@ RE_CONFIG = BackportConfig(
 _ALL_CONFIGS = (COLLECTIONS_CONFIG, CONTEXTLIB_CONFIG, RE_CONFIG)
 
 
-def convert(module: cst.Module) -> cst.Module:
+def convert(
+    module: cst.Module,
+    modules: Collection[str] | None = None,
+) -> cst.Module:
+    """Apply each config in turn.
+
+    If given, only the configs whose (top-level) source module is in
+    ``modules`` are run: each config's pass walks the whole module, so the
+    pipeline passes the modules the source names.
+    """
     for config in _ALL_CONFIGS:
-        module = transform_module(module, config)
+        if modules is None or config.source_module.partition(".")[0] in modules:
+            module = transform_module(module, config)
     return module
@@ -1,9 +1,48 @@
 from __future__ import annotations
 
+import functools
+from typing import Sequence
+
 import libcst as cst
 
 from .import_utils import EnhancedImportManager
 
+# libcst nodes are immutable, so these can be shared between rewrites.
+_TYPING_NAME = cst.Name("typing")
+_TYPING_TYPEVAR_ATTR = cst.Attribute(_TYPING_NAME, cst.Name("TypeVar"))
+_TYPING_GENERIC_ATTR = cst.Attribute(_TYPING_NAME, cst.Name("Generic"))
+_TYPE_ALIAS_ANNOTATION = cst.Annotation(
+    cst.Attribute(_TYPING_NAME, cst.Name("TypeAlias")),
+)
+_BOUND_NAME = cst.Name("bound")
+_NO_SPACE_EQUAL = cst.AssignEqual(
+    whitespace_before=cst.SimpleWhitespace(""),
+    whitespace_after=cst.SimpleWhitespace(""),
+)
+
+
+def _type_var_assign(
+    name: str,
+    bound: cst.BaseExpression | None = None,
+) -> cst.Assign:
+    """Create ``name = typing.TypeVar("name"[, bound=...])``."""
+    type_var_args = [cst.Arg(cst.SimpleString(f'"{name}"'))]
+    if bound is not None:
+        type_var_args.append(
+            cst.Arg(bound, _BOUND_NAME, _NO_SPACE_EQUAL),
+        )
+
+    # Always use typing.TypeVar
+    return cst.Assign(
+        [cst.AssignTarget(cst.Name(name))],
+        cst.Call(_TYPING_TYPEVAR_ATTR, type_var_args),
+    )
+
+
+# Type parameter names (T, K, V, ...) repeat a lot, and without a bound the
+# declaration only depends on the name, so it can be shared.
+_unbound_type_var_assign = functools.lru_cache(maxsize=256)(_type_var_assign)
+
 
 class PEP695Transformer(cst.CSTTransformer):
     """
@@ -34,59 +73,38 @@ class PEP695Transformer(cst.CSTTransformer):
     This follows the patterns described in PEP 695 for backward compatibility.
     """
 
-    def __init__(self) -> None:
-        self.import_manager = EnhancedImportManager()
+    def __init__(self, import_manager: EnhancedImportManager | None = None) -> None:
+        super().__init__()
+        if import_manager is None:
+            import_manager = EnhancedImportManager()
+        self.import_manager = import_manager
         self.needs_typing_import = False
         self.needs_generic_import = False
-        self.type_vars_to_create: list[str] = []
-        super().__init__()
 
-    def _create_type_var(self, param: cst.TypeParam) -> cst.SimpleStatementLine:
+    def _create_type_var(
+        self,
+        param: cst.TypeParam,
+        leading_lines: Sequence[cst.EmptyLine] = (),
+    ) -> cst.SimpleStatementLine:
         """Create a TypeVar declaration from a TypeParam."""
-        if not isinstance(param.param, cst.TypeVar):
+        if type(param.param) is not cst.TypeVar:
             raise ValueError(f"Expected TypeVar, got {type(param.param)}")
 
         param_name = param.param.name.value
+        bound = param.param.bound
+        if bound:
+            type_var_assign = _type_var_assign(param_name, bound)
+        else:
+            type_var_assign = _unbound_type_var_assign(param_name)
 
-        # Create TypeVar call
-        type_var_args = [cst.Arg(cst.SimpleString(f'"{param_name}"'))]
-
-        # Handle bound if present
-        if param.param.bound:
-            type_var_args.append(
-                cst.Arg(
-                    value=param.param.bound,
-                    keyword=cst.Name("bound"),
-                    equal=cst.AssignEqual(
-                        whitespace_before=cst.SimpleWhitespace(""),
-                        whitespace_after=cst.SimpleWhitespace(""),
-                    ),
-                ),
-            )
-
-        # Always use typing.TypeVar
-        type_var_call = cst.Call(
-            func=cst.Attribute(
-                value=cst.Name("typing"),
-                attr=cst.Name("TypeVar"),
-            ),
-            args=type_var_args,
-        )
-
-        # Create assignment for TypeVar
-        type_var_assign = cst.Assign(
-            targets=[cst.AssignTarget(target=cst.Name(param_name))],
-            value=type_var_call,
-        )
+        return cst.SimpleStatementLine([type_var_assign], leading_lines)
 
-        return cst.SimpleStatementLine(
-            body=[type_var_assign],
-            trailing_whitespace=cst.TrailingWhitespace(
-                whitespace=cst.SimpleWhitespace(""),
-                comment=None,
-                newline=cst.Newline(),
-            ),
-        )
+    def visit_SimpleStatementLine(self, node: cst.SimpleStatementLine) -> bool:
+        # Type aliases, generic classes and generic functions are all
+        # statements, so nothing inside a simple statement needs visiting.
+        # Skipping those subtrees avoids walking (and rebuilding) most of the
+        # module's nodes; leave_SimpleStatementLine is still called.
+        return False
 
     def leave_SimpleStatementLine(
         self,
@@ -94,116 +112,53 @@ class PEP695Transformer(cst.CSTTransformer):
         updated_node: cst.SimpleStatementLine,
     ) -> cst.SimpleStatementLine | cst.FlattenSentinel:
         """Transform SimpleStatementLine containing TypeAlias."""
-        # Check if this line contains a type alias
-        if len(updated_node.body) == 1 and isinstance(
-            updated_node.body[0],
-            cst.TypeAlias,
-        ):
-            type_alias = updated_node.body[0]
-            name = type_alias.name.value
-            statements: list[cst.SimpleStatementLine] = []
-
-            # Handle generic type parameters if present
-            if type_alias.type_parameters:
-                self.needs_typing_import = True
-
-                # Create TypeVar declarations for each type parameter
-                for param in type_alias.type_parameters.params:
-                    if isinstance(param, cst.TypeParam) and isinstance(
-                        param.param,
-                        cst.TypeVar,
-                    ):
-                        param_name = param.param.name.value
-
-                        # Create TypeVar call
-                        type_var_args = [cst.Arg(cst.SimpleString(f'"{param_name}"'))]
-
-                        # Handle bound if present
-                        if param.param.bound:
-                            type_var_args.append(
-                                cst.Arg(
-                                    value=param.param.bound,
-                                    keyword=cst.Name("bound"),
-                                    equal=cst.AssignEqual(
-                                        whitespace_before=cst.SimpleWhitespace(""),
-                                        whitespace_after=cst.SimpleWhitespace(""),
-                                    ),
-                                ),
-                            )
-
-                        # Always use typing.TypeVar
-                        type_var_call = cst.Call(
-                            func=cst.Attribute(
-                                value=cst.Name("typing"),
-                                attr=cst.Name("TypeVar"),
-                            ),
-                            args=type_var_args,
-                        )
-
-                        # Create assignment for TypeVar
-                        type_var_assign = cst.Assign(
-                            targets=[cst.AssignTarget(target=cst.Name(param_name))],
-                            value=type_var_call,
-                        )
-
-                        statements.append(
-                            cst.SimpleStatementLine(
-                                body=[type_var_assign],
-                                leading_lines=(
-                                    updated_node.leading_lines
-                                    if len(statements) == 0
-                                    else ()
-                                ),
-                                trailing_whitespace=cst.TrailingWhitespace(
-                                    whitespace=cst.SimpleWhitespace(""),
-                                    comment=None,
-                                    newline=cst.Newline(),
-                                ),
-                            ),
-                        )
-
-            # Create the main type alias assignment
-            # For non-generic aliases, we just create a simple assignment
-            # For generic aliases, we need to annotate with TypeAlias
-            if type_alias.type_parameters:
-                # Generic type alias - annotate with TypeAlias
-                self.needs_typing_import = True
-
-                # Always use typing.TypeAlias
-                type_alias_annotation = cst.Attribute(
-                    value=cst.Name("typing"),
-                    attr=cst.Name("TypeAlias"),
-                )
-
-                type_alias_assign = cst.AnnAssign(
-                    target=cst.Name(name),
-                    annotation=cst.Annotation(annotation=type_alias_annotation),
-                    value=type_alias.value,
-                )
-            else:
-                # Simple type alias - just assignment
-                type_alias_assign = cst.Assign(
-                    targets=[cst.AssignTarget(target=cst.Name(name))],
-                    value=type_alias.value,
-                )
+        # Every statement passes through here, so bail out as cheaply as
+        # possible unless the line is a lone type alias. libcst's node classes
+        # aren't subclassed, so an exact type check suffices.
+        body = updated_node.body
+        if len(body) != 1 or type(body[0]) is not cst.TypeAlias:
+            return updated_node
 
-            statements.append(
-                cst.SimpleStatementLine(
-                    body=[type_alias_assign],
-                    leading_lines=(
-                        updated_node.leading_lines if len(statements) == 0 else ()
-                    ),
-                    trailing_whitespace=updated_node.trailing_whitespace,
-                ),
+        type_alias = cst.ensure_type(body[0], cst.TypeAlias)
+        name = type_alias.name.value
+        value = type_alias.value
+        type_parameters = type_alias.type_parameters
+        statements: list[cst.SimpleStatementLine] = []
+        # The alias's leading lines (comments, blank lines) go on the first
+        # statement emitted.
+        leading_lines: Sequence[cst.EmptyLine] = updated_node.leading_lines
+
+        if type_parameters is not None:
+            # Generic type alias - declare a TypeVar for each type parameter
+            # and annotate the alias with TypeAlias.
+            self.needs_typing_import = True
+
+            for param in type_parameters.params:
+                if type(param) is cst.TypeParam and type(param.param) is cst.TypeVar:
+                    statements.append(self._create_type_var(param, leading_lines))
+                    leading_lines = ()
+
+            # Always use typing.TypeAlias
+            type_alias_assign: cst.BaseSmallStatement = cst.AnnAssign(
+                cst.Name(name),
+                _TYPE_ALIAS_ANNOTATION,
+                value,
             )
+        else:
+            # Simple type alias - just assignment
+            type_alias_assign = cst.Assign([cst.AssignTarget(cst.Name(name))], value)
 
-            # Return as multiple statements if we have TypeVar declarations
-            if len(statements) > 1:
-                return cst.FlattenSentinel(statements)
-            else:
-                return statements[0]
+        alias_stmt = cst.SimpleStatementLine(
+            [type_alias_assign],
+            leading_lines,
+            updated_node.trailing_whitespace,
+        )
 
-        return updated_node
+        # Return as multiple statements if we have TypeVar declarations
+        if not statements:
+            return alias_stmt
+        statements.append(alias_stmt)
+        return cst.FlattenSentinel(statements)
 
     def leave_ClassDef(
         self,
@@ -222,10 +177,7 @@ class PEP695Transformer(cst.CSTTransformer):
         type_var_names = []
 
         for param in updated_node.type_parameters.params:
-            if isinstance(param, cst.TypeParam) and isinstance(
-                param.param,
-                cst.TypeVar,
-            ):
+            if type(param) is cst.TypeParam and type(param.param) is cst.TypeVar:
                 param_name = param.param.name.value
                 type_var_names.append(param_name)
 
@@ -237,24 +189,10 @@ class PEP695Transformer(cst.CSTTransformer):
             # Create subscript arguments for Generic
             generic_args = []
             for name in type_var_names:
-                generic_args.append(
-                    cst.SubscriptElement(
-                        slice=cst.Index(value=cst.Name(name)),
-                    ),
-                )
+                generic_args.append(cst.SubscriptElement(cst.Index(cst.Name(name))))
 
             # Create Generic[T, U, ...] arg - always use typing.Generic
-            generic_base = cst.Attribute(
-                value=cst.Name("typing"),
-                attr=cst.Name("Generic"),
-            )
-
-            generic_arg = cst.Arg(
-                value=cst.Subscript(
-                    value=generic_base,
-                    slice=generic_args,
-                ),
-            )
+            generic_arg = cst.Arg(cst.Subscript(_TYPING_GENERIC_ATTR, generic_args))
 
             # Add Generic to the class bases
             new_bases = list(updated_node.bases) if updated_node.bases else []
@@ -293,10 +231,7 @@ class PEP695Transformer(cst.CSTTransformer):
         type_var_statements = []
 
         for param in updated_node.type_parameters.params:
-            if isinstance(param, cst.TypeParam) and isinstance(
-                param.param,
-                cst.TypeVar,
-            ):
+            if type(param) is cst.TypeParam and type(param.param) is cst.TypeVar:
                 type_var_stmt = self._create_type_var(param)
                 type_var_statements.append(type_var_stmt)
 
@@ -324,11 +259,6 @@ class PEP695Transformer(cst.CSTTransformer):
         if not self.needs_typing_import:
             return updated_node
 
-        # Scan existing imports
-        self.import_manager.scan_imports(updated_node.body)
-
-        # Add "import typing" using the enhanced import manager
-        new_body = list(updated_node.body)
-        new_body = self.import_manager.ensure_direct_import(new_body, "typing")
-
-        return updated_node.with_changes(body=new_body)
+        # Add "import typing" using the (possibly shared) import manager
+        self.import_manager.require_direct_import("typing")
+        return self.import_manager.apply_direct_imports(updated_node)
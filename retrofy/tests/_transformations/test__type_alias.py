@@ -198,7 +198,8 @@ def test_integration_with_converters():
     """)
 
     expected = textwrap.dedent("""
-    Point = tuple[float, float]
+    import typing
+    Point = typing.Tuple[float, float]
     """)
 
     result = _converters.convert(test_case_source)
@@ -214,7 +215,7 @@ def test_integration_generic_with_converters():
     expected = textwrap.dedent("""
     import typing
     T = typing.TypeVar("T")
-    GenericPoint: typing.TypeAlias = tuple[T, T]
+    GenericPoint: typing.TypeAlias = typing.Tuple[T, T]
     """)
 
     result = _converters.convert(test_case_source)
@@ -282,6 +283,29 @@ def test_generic_function_simple():
     assert result.code == expected
 
 
+def test_nested_generics():
+    """Test generics nested in other compound statements."""
+    test_case_source = textwrap.dedent("""
+    if True:
+        def func[T](a: T) -> T:
+            type Alias = list[T]
+            return a
+    """)
+
+    expected = textwrap.dedent("""
+    import typing
+    if True:
+        T = typing.TypeVar("T")
+        def func(a: T) -> T:
+            Alias = list[T]
+            return a
+    """)
+
+    module = cst.parse_module(test_case_source)
+    result = _converters.convert_type_alias(module)
+    assert result.code == expected
+
+
 def test_integration_generic_class_with_converters():
     """Test generic class works with the full converter pipeline."""
     test_case_source = textwrap.dedent("""
@@ -286,6 +286,30 @@ def test_attribute_access():
     assert t(expected) == expected
 
 
+def test_attribute_access_after_docstring():
+    src = """
+    \"\"\"Docstring.\"\"\"
+    import collections.abc
+
+    def f(m: collections.abc.Mapping[str, int]) -> int:
+        return len(m)
+    """
+    expected = textwrap.dedent("""
+    \"\"\"Docstring.\"\"\"
+    import sys
+    import collections.abc
+
+    if sys.version_info < (3, 9):
+        import typing
+        collections.abc.Mapping = typing.Mapping
+
+    def f(m: collections.abc.Mapping[str, int]) -> int:
+        return len(m)
+    """)
+    assert t(src) == expected
+    assert t(expected) == expected
+
+
 def test_type_checking_block():
     src = """
     import typing
@@ -0,0 +1,124 @@
+import textwrap
+
+import libcst as cst
+
+from retrofy._transformations._composite import CompositeTransformer
+from retrofy._transformations.dataclass import DataclassTransformer
+from retrofy._transformations.type_alias import PEP695Transformer
+from retrofy._transformations.walrus import WalrusOperatorTransformer
+
+
+def test_composite_matches_sequential_passes():
+    source = textwrap.dedent("""
+    from dataclasses import dataclass
+
+    type Pair[T] = tuple[T, T]
+
+    @dataclass
+    class Point[T]:
+        x: T
+        y: T
+
+    def f(data):
+        if (n := len(data)) > 3:
+            return n
+    """)
+    module = cst.parse_module(source)
+
+    sequential = module
+    for transformer in (
+        WalrusOperatorTransformer(),
+        PEP695Transformer(),
+        DataclassTransformer(),
+    ):
+        sequential = sequential.visit(transformer)
+
+    fused = module.visit(
+        CompositeTransformer(
+            [
+                WalrusOperatorTransformer(),
+                PEP695Transformer(),
+                DataclassTransformer(),
+            ],
+        ),
+    )
+    assert fused.code == sequential.code
+
+
+class _NameRecorder(cst.CSTTransformer):
+    def __init__(self, skip_functions: bool):
+        self.skip_functions = skip_functions
+        self.names: list[str] = []
+        super().__init__()
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        return not self.skip_functions
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        self.names.append(updated_node.value)
+        return updated_node
+
+
+def test_composite_honours_skipped_subtrees():
+    module = cst.parse_module("a = 1\ndef f():\n    b = 2\nc = 3\n")
+    skipping = _NameRecorder(skip_functions=True)
+    recording = _NameRecorder(skip_functions=False)
+
+    module.visit(CompositeTransformer([skipping, recording]))
+
+    assert skipping.names == ["a", "c"]
+    assert recording.names == ["a", "f", "b", "c"]
+
+
+class _EventRecorder(cst.CSTTransformer):
+    """Does its own dispatch, so should see every event."""
+
+    def __init__(self):
+        self.events: list[str] = []
+        super().__init__()
+
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        self.events.append(f"visit {type(node).__name__}")
+        return True
+
+    def on_visit_attribute(self, node: cst.CSTNode, attribute: str) -> None:
+        self.events.append(f"visit {type(node).__name__}.{attribute}")
+
+
+class _ArgsRecorder(cst.CSTTransformer):
+    def __init__(self):
+        self.calls = 0
+        super().__init__()
+
+    def visit_Call_args(self, node: cst.Call) -> None:
+        self.calls += 1
+
+
+def test_composite_forwards_generic_and_attribute_hooks():
+    module = cst.parse_module("f(a)\n")
+    direct = _EventRecorder()
+    module.visit(direct)
+    fused = _EventRecorder()
+    args = _ArgsRecorder()
+
+    module.visit(CompositeTransformer([fused, args]))
+
+    assert fused.events == direct.events
+    assert args.calls == 1
+
+
+def test_composite_skips_children_without_a_hook(monkeypatch):
+    # CSTTransformer has a no-op visit_Name, which _NameRecorder inherits.
+    # Replacing that no-op with a spy shows it is never called.
+    calls = []
+    monkeypatch.setattr(
+        cst.CSTTransformer,
+        "visit_Name",
+        lambda self, node: calls.append(node),
+    )
+    recording = _NameRecorder(skip_functions=False)
+
+    cst.parse_module("a = b\n").visit(CompositeTransformer([recording]))
+
+    assert recording.names == ["a", "b"]
+    assert calls == []
@@ -231,3 +231,19 @@ def test_dataclass_with_match_args_false_and_explicit():
         # The explicit __match_args__ should override match_args=False
         assert original_results["has_match_args"] is True
         assert original_results["match_args_value"] == ("y", "x")
+
+
+def test_dataclass_with_annotated_match_args():
+    """An annotated __match_args__ is respected just like a plain one."""
+
+    source = textwrap.dedent("""
+    from dataclasses import dataclass
+
+    @dataclass
+    class Point:
+        x: int
+        y: int
+        __match_args__: tuple = ('y',)
+    """)
+
+    assert transform_dataclass(source) == source
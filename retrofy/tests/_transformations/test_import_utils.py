@@ -0,0 +1,153 @@
+import textwrap
+
+import libcst as cst
+
+from retrofy._transformations.import_utils import EnhancedImportManager
+
+
+def _scanned(source: str) -> EnhancedImportManager:
+    manager = EnhancedImportManager()
+    manager.scan_imports(cst.parse_module(textwrap.dedent(source)).body)
+    return manager
+
+
+def test_import_lookups():
+    manager = _scanned("""
+    from typing import Literal, final as fi_na_l
+    from collections.abc import Mapping
+    import typing
+    """)
+
+    assert manager.has_import("typing", "Literal")
+    assert manager.has_import("collections.abc", "Mapping")
+    assert not manager.has_import("typing", "Mapping")
+    assert not manager.has_import("typing", "typing")
+    assert manager.get_import_alias("typing", "Literal") == "Literal"
+    assert manager.get_import_alias("typing", "final") == "fi_na_l"
+    assert manager.get_import_alias("typing", "TypedDict") is None
+    assert manager.has_direct_import("typing")
+
+
+def test_import_lookups_use_first_import():
+    manager = _scanned("""
+    from typing import final as first
+    from typing import final as second
+    """)
+
+    assert manager.get_import_alias("typing", "final") == "first"
+
+
+def test_rescan_forgets_previous_imports():
+    manager = _scanned("from typing import Literal\n")
+    manager.scan_imports(cst.parse_module("import os\n").body)
+
+    assert not manager.has_import("typing", "Literal")
+
+
+def test_scan_import_from():
+    module = cst.parse_module("import os\nfrom typing import Literal\n")
+    manager = EnhancedImportManager()
+    manager.scan_import_from(module.body[1].body[0])
+
+    assert manager.has_import("typing", "Literal")
+    assert not manager.has_direct_import("os")
+    body = manager.remove_from_imports(module.body, "typing", "Literal")
+    assert cst.Module(body=body).code == "import os\n"
+
+
+def test_remove_from_imports_keeps_untouched_statements():
+    module = cst.parse_module(
+        textwrap.dedent("""
+        import os
+        from typing import Literal, final
+        from typing import Literal
+        x = 1
+        """),
+    )
+    manager = EnhancedImportManager()
+    manager.scan_imports(module.body)
+
+    body = manager.remove_from_imports(list(module.body), "typing", "Literal")
+
+    assert cst.Module(body=body).code == "import os\nfrom typing import final\nx = 1\n"
+    assert body[0] is module.body[0]
+    assert body[2] is module.body[3]
+    assert manager.remove_from_imports(body, "typing", "TypedDict") is body
+
+
+def test_remove_names_from_imports():
+    module = cst.parse_module(
+        textwrap.dedent("""
+        from typing import Literal, final, TypedDict
+        from typing import Literal
+        import os
+        """),
+    )
+    manager = EnhancedImportManager()
+    manager.scan_imports(module.body)
+
+    body = manager.remove_names_from_imports(
+        module.body,
+        "typing",
+        ["Literal", "TypedDict", "Protocol"],
+    )
+
+    assert cst.Module(body=body).code == "from typing import final\nimport os\n"
+    assert manager.remove_names_from_imports(body, "typing", ["Protocol"]) is body
+    # Already removed, though the names were scanned.
+    assert manager.remove_names_from_imports(body, "typing", ["Literal"]) is body
+
+
+def test_apply_direct_imports_after_future_imports():
+    module = cst.parse_module(
+        textwrap.dedent("""
+        \"\"\"Docstring.\"\"\"
+        from __future__ import annotations
+        import os
+        import typing
+        x = 1
+        """),
+    )
+    manager = EnhancedImportManager()
+    manager.require_direct_import("typing")
+    manager.require_direct_import("sys")
+
+    result = manager.apply_direct_imports(module)
+
+    assert result.code == textwrap.dedent("""
+    \"\"\"Docstring.\"\"\"
+    from __future__ import annotations
+    import sys
+    import os
+    import typing
+    x = 1
+    """)
+
+
+def test_ensure_early_direct_imports():
+    module = cst.parse_module(
+        textwrap.dedent("""
+        \"\"\"Docstring.\"\"\"
+        import typing
+        x = 1
+        import sys
+        """),
+    )
+    manager = EnhancedImportManager()
+
+    body = manager.ensure_early_direct_imports(
+        list(module.body),
+        ["collections.abc", "typing", "sys"],
+    )
+
+    assert module.with_changes(body=body).code == textwrap.dedent("""
+    \"\"\"Docstring.\"\"\"
+    import collections.abc
+    import sys
+    import typing
+    x = 1
+    import sys
+    """)
+    assert manager.ensure_early_direct_imports(body, ["sys", "typing"]) is body
+    assert manager.find_post_import_position(body) == 4
+    assert EnhancedImportManager().find_post_import_position(list(body)) == 4
@@ -224,6 +224,17 @@ def test_pep585_imports_chain_through_convert():
     assert "from typing import Pattern" in out
 
 
+def test_pep585_imports_convert_selected_modules():
+    src = textwrap.dedent("""
+    from collections import deque
+    from re import Pattern
+    """)
+    mod = cst.parse_module(src)
+    out = convert_pep585(mod, {"re", "typing"}).code
+    assert "from typing import Deque as deque" not in out
+    assert "from typing import Pattern" in out
+
+
 def test_full_pipeline_integration():
     src = textwrap.dedent("""
     from collections import deque
@@ -1,8 +1,6 @@
 import textwrap
 from typing import Any, Dict
 
-import pytest
-
 
 def execute_code_with_results(code: str) -> Dict[str, Any]:
     """Execute code and return the final locals() containing results."""
@@ -675,7 +673,6 @@ def test_not_quite_right_version_check():
     assert expected == transform_typing_extensions(expected)
 
 
-@pytest.mark.xfail(strict=True)
 def test_final_duplicated_import_in_type_checking():
     source = textwrap.dedent("""
     import typing
@@ -2105,3 +2102,83 @@ def test_invalid_runtime_code():
     result = transform_typing_extensions(source)
     assert result == expected
     assert expected == transform_typing_extensions(expected)
+
+
+def test_existing_sys_import_after_docstring():
+    """An existing ``import sys`` after the module docstring is reused."""
+
+    source = textwrap.dedent('''
+    """Module docstring."""
+    import sys
+    from typing import Literal
+    x: Literal[1]
+    ''')
+
+    expected = textwrap.dedent('''
+    """Module docstring."""
+    import sys
+
+    if sys.version_info >= (3, 8):
+        from typing import Literal
+    else:
+        from typing_extensions import Literal
+    x: Literal[1]
+    ''')
+
+    result = transform_typing_extensions(source)
+    assert result == expected
+    assert expected == transform_typing_extensions(expected)
+
+
+def test_nested_import_after_version_check():
+    """A version check earlier in the module doesn't cover later imports."""
+
+    source = textwrap.dedent("""
+    import sys
+    if sys.version_info >= (3, 8):
+        pass
+
+    def f():
+        from typing import Literal
+        return Literal
+    """)
+
+    expected = textwrap.dedent("""
+    import sys
+    if sys.version_info >= (3, 8):
+        pass
+
+    def f():
+        if sys.version_info >= (3, 8):
+            from typing import Literal
+        else:
+            from typing_extensions import Literal
+        return Literal
+    """)
+
+    result = transform_typing_extensions(source)
+    assert result == expected
+    assert expected == transform_typing_extensions(expected)
+
+
+def test_unrelated_blocks_are_not_rebuilt():
+    import libcst as cst
+
+    from retrofy._transformations.typing_extensions import convert
+
+    module = cst.parse_module(
+        textwrap.dedent("""
+        def f():
+            if x:
+                return 1
+
+        def g():
+            from typing import Literal
+            return Literal
+        """),
+    )
+
+    result = convert(module)
+
+    assert "typing_extensions" in result.code
+    assert result.body[-2] is module.body[0]
@@ -1,6 +1,8 @@
 import textwrap
+import warnings
 
 import libcst as cst
+import pytest
 
 from retrofy import _converters
 
@@ -116,8 +118,169 @@ def test_convert():
     """)
 
     expected = textwrap.dedent("""
+    import typing
     def bar(a: typing.List[str]) -> typing.List[str]:
         return a
     """)
     result = _converters.convert(test_case_source)
     assert result == expected
+
+
+def test_sequence_subscript():
+    test_case_source = textwrap.dedent("""
+    import foo
+
+    def bar(a: dict[str, list[int]]) -> tuple[int, ...]:
+        return foo.baz[a]
+    """)
+
+    expected = textwrap.dedent("""
+    import typing
+    import foo
+
+    def bar(a: typing.Dict[str, typing.List[int]]) -> typing.Tuple[int, ...]:
+        return foo.baz[a]
+    """)
+    module = cst.parse_module(test_case_source)
+    result = _converters.convert_sequence_subscript(module)
+    assert result.code == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        # ``list``/``dict`` are locals (as in the stdlib's pipes and
+        # idlelib.autoexpand).
+        "def f(list):\n    list[0][0] = 1\n    return list[0][1:3]\n",
+        "def f():\n    dict = {}\n    dict['w'] = 'w'\n",
+        "def f(list):\n    return list[0]\n",
+        # Runtime values (as in the stdlib's types).
+        "GenericAlias = type(list[int])\n",
+        "x = list[int]()\n",
+        # Called or indexed again within an annotation.
+        "x: Annotated[int, f(list[int])]\n",
+        "x: list[int][0]\n",
+        # Rebound in an enclosing scope.
+        "class A:\n    list = 1\n\n    def f(self) -> list[int]:\n        pass\n",
+        "def f():\n    x: list[int] = []\n    list = 1\n",
+        # Only ``X: TypeAlias = ...`` declares an alias.
+        "x: int = list[0]\n",
+    ],
+)
+def test_sequence_subscript_leaves_runtime_values(source):
+    module = cst.parse_module(source)
+    assert _converters.convert_sequence_subscript(module).code == source
+    assert _converters.convert(source) == source
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            "from typing import TypeAlias\nX: TypeAlias = list[int]\n",
+            "import typing\nfrom typing import TypeAlias\n"
+            "X: TypeAlias = typing.List[int]\n",
+        ),
+        (
+            "T = TypeVar('T', bound=dict[str, int])\n",
+            "import typing\nT = TypeVar('T', bound=typing.Dict[str, int])\n",
+        ),
+        (
+            "type X[T: list[int]] = tuple[T, T]\n",
+            "import typing\ntype X[T: typing.List[int]] = typing.Tuple[T, T]\n",
+        ),
+        (
+            # The signature is evaluated outside the function's own scope.
+            "def f(list: list[int]) -> dict[str, int]:\n    y: list[int]\n",
+            "import typing\ndef f(list: typing.List[int]) -> "
+            "typing.Dict[str, int]:\n    y: list[int]\n",
+        ),
+    ],
+)
+def test_sequence_subscript_type_expressions(source, expected):
+    module = cst.parse_module(source)
+    assert _converters.convert_sequence_subscript(module).code == expected
+
+
+def test_convert_single_typing_import():
+    test_case_source = textwrap.dedent("""
+    type Pair[T] = tuple[T, T]
+
+    def bar(a: list[str] | None) -> None:
+        pass
+    """)
+
+    result = _converters.convert(test_case_source)
+    assert result.count("import typing") == 1
+
+
+def test_convert_without_features_is_unchanged():
+    test_case_source = textwrap.dedent("""
+    \"\"\"Mentions list[int] and a := b, but only in text.\"\"\"
+
+    def bar(a, b):
+        # x: int | None
+        return a + b
+    """)
+
+    result = _converters.convert(test_case_source)
+    assert result == test_case_source
+
+
+def test_convert_without_features_reports_syntax_errors():
+    with pytest.raises(SyntaxError):
+        _converters.convert("def f(:\n    pass\n")
+
+
+@pytest.mark.parametrize("min_parallel_sources", [1, 1000])
+def test_convert_all(monkeypatch, min_parallel_sources):
+    monkeypatch.setattr(
+        _converters,
+        "_MIN_PARALLEL_SOURCES",
+        min_parallel_sources,
+    )
+    monkeypatch.setattr(_converters.os, "cpu_count", lambda: 2)
+    codes = [
+        "x: list[int]\n",
+        "type Pair[T] = tuple[T, T]\n",
+        "def bar(a, b):\n    return a + b\n",
+    ]
+
+    assert _converters.convert_all(codes) == [
+        _converters.convert(code) for code in codes
+    ]
+
+
+@pytest.mark.parametrize("min_parallel_sources", [1, 1000])
+def test_convert_all_reemits_warnings(monkeypatch, min_parallel_sources):
+    # Worker processes don't share the caller's warning filters, so their
+    # warnings must surface here whichever path converted the source.
+    monkeypatch.setattr(
+        _converters,
+        "_MIN_PARALLEL_SOURCES",
+        min_parallel_sources,
+    )
+    monkeypatch.setattr(_converters.os, "cpu_count", lambda: 2)
+    codes = ["x = 1\n", '__lazy_modules__ = ["json"]\nlazy import json\n']
+
+    with pytest.warns(_converters.lazy_imports.LazyModulesIgnoredWarning):
+        _converters.convert_all(codes)
+
+
+def test_convert_all_dedupes_warnings_on_both_paths(monkeypatch):
+    # Under the ``default`` action a repeated warning is shown once, however
+    # many worker processes raised it.
+    monkeypatch.setattr(_converters.os, "cpu_count", lambda: 2)
+    codes = ['__lazy_modules__ = ["json"]\nlazy import json\n'] * 4
+    counts = []
+    for min_parallel_sources in [1000, 1]:
+        monkeypatch.setattr(
+            _converters,
+            "_MIN_PARALLEL_SOURCES",
+            min_parallel_sources,
+        )
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("default")
+            _converters.convert_all(codes)
+        counts.append(len(caught))
+    assert counts == [1, 1]
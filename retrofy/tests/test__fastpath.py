@@ -0,0 +1,159 @@
+import importlib
+import pkgutil
+import textwrap
+
+import libcst as cst
+import pytest
+
+from retrofy import _converters, _fastpath, _transformations
+from retrofy._transformations._backport_engine import BackportConfig
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "x: list[int]\n",
+        "# comment\n\nx: list[int]\n",
+        "#!/usr/bin/env python\nimport os\n\nx: list[int]\n",
+        '"""Docstring."""\n\n# comment\nx: list[int]\n',
+        b'b"""Docstring."""\nx: list[int]\n'.decode(),
+        textwrap.dedent("""
+        \"\"\"Docstring.\"\"\"  # comment
+        from __future__ import annotations
+
+        from __future__ import division
+        x: list[int]
+        """),
+        '"implicitly" "concatenated"\nx: list[int]\n',
+        "@deco\ndef f(a: dict[str, tuple[int, ...]]) -> list [int]:\n    pass\n",
+        'x = "é"; y: list[int]\n',
+        "s = 'list[int]'\ny = foo.list[0]\nz: list[\n    int\n]\n",
+        "async def f(*args: list[int], **kw: dict[str, int]): pass\n",
+    ],
+)
+def test_matches_cst_conversion(source):
+    expected = _converters.convert_sequence_subscript(cst.parse_module(source)).code
+    assert _fastpath.convert_builtin_generics(source) == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        # Other conversions are needed.
+        "x: list[int] | None\n",
+        "import typing\nx: list[int]\n",
+        "if (n := 1):\n    x: list[int]\n",
+        # A layout which the text splicing doesn't reproduce.
+        '"""Docstring."""; x = 1\ny: list[int]\n',
+        "x: list[int]\r\n",
+        # Invalid code is left for libcst to report.
+        "x: list[int\n",
+        # Subscripts outside annotations, and rebound names, are left for the
+        # CST conversion to judge.
+        "x: list[int]\nz = list[\n    int\n]\n",
+        "from typing import TypeAlias\nX: TypeAlias = list[int]\n",
+        "x: list[int]\ny = list[int]()\n",
+        "def f(list) -> dict[str, int]:\n    return list[0]\n",
+        "dict = {}\nx: list[int]\n",
+        "x: Annotated[list[int], f(1)]\n",
+        "x: list[int][0]\n",
+    ],
+)
+def test_falls_back(source):
+    assert _fastpath.convert_builtin_generics(source) is None
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "type X = int\n",
+        "type   X=int  # comment\n",
+        "class C:\n    type X = int\n\ntype Y = dict\n",
+        "type X = \\\n    int\n",
+        "type X = (\n    int,\n    str\n)\n",
+        "type X = lambda: 1\n",
+    ],
+)
+def test_type_aliases_match_cst_conversion(source):
+    module = _converters.convert_type_alias(cst.parse_module(source))
+    expected = _converters.convert_sequence_subscript(module).code
+    features = _fastpath.sniff_features(source)
+    assert _fastpath.convert(source, features) == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        # These need TypeVars.
+        "type X[T] = list[T]\n",
+        "def f[T](a: T) -> T:\n    return a\n",
+        # Alias values are type expressions, which the CST conversion lowers.
+        "class C:\n    type X = list[int]\n\ntype Y = dict[str, int]\n",
+        # The CST conversion leaves these alone.
+        "type X = int; y = 1\n",
+        "if x: type X = int\n",
+        # Valid assignments, but invalid aliases.
+        "type X = a, b\n",
+        "type X = yield\n",
+    ],
+)
+def test_type_aliases_fall_back(source):
+    features = _fastpath.sniff_features(source)
+    assert _fastpath.convert(source, features) is None
+
+
+def test_sniff_ignores_strings_and_comments():
+    features = _fastpath.sniff_features(
+        textwrap.dedent("""
+        # x: list[int] | None
+        s = "a := b; import typing"
+        match = 1
+        """),
+    )
+    assert features == _fastpath.SourceFeatures(
+        builtin_generic=False,
+        walrus=False,
+        type_params=False,
+        dataclass=False,
+        match=True,
+        union=False,
+        backport_modules=frozenset(),
+    )
+
+
+def test_convert_uses_fast_path():
+    source = '"""Docstring."""\nx: dict[str, int]\n'
+    assert _converters.convert(source) == (
+        '"""Docstring."""\nimport typing\nx: typing.Dict[str, int]\n'
+    )
+
+
+def test_convert_leaves_unaffected_source():
+    source = "import os\n\n\ndef f(a, b):\n    return a + b\n"
+    features = _fastpath.sniff_features(source)
+    assert not features.needs_conversion()
+    assert _fastpath.convert(source, features) is source
+
+
+def test_convert_checks_syntax_against_the_target():
+    # Valid on the running interpreter, but not on the oldest target, so
+    # it is left for libcst to accept or reject.
+    source = "try:\n    pass\nexcept* ValueError:\n    pass\n"
+    features = _fastpath.sniff_features(source)
+    assert not features.needs_conversion()
+    assert _fastpath.convert(source, features) is None
+
+
+def test_backport_modules_cover_every_config():
+    configs = []
+    for info in pkgutil.iter_modules(_transformations.__path__):
+        module = importlib.import_module(f"{_transformations.__name__}.{info.name}")
+        for value in vars(module).values():
+            if isinstance(value, BackportConfig):
+                configs.append(value)
+            elif isinstance(value, tuple):
+                configs.extend(v for v in value if isinstance(v, BackportConfig))
+    assert configs
+    for config in configs:
+        top_level = config.source_module.partition(".")[0]
+        assert top_level in _fastpath.BACKPORT_MODULES, config.source_module
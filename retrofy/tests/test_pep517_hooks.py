@@ -666,6 +666,41 @@ def test_lower_sdist_converts_py_files(tmp_path, monkeypatch):
     assert "__lazy_from__" in files["dummypkg/x.py"].decode("utf-8")
 
 
+def test_lower_sdist_converts_in_parallel(tmp_path, monkeypatch):
+    # Enough sources to go through convert_all's worker processes, whose
+    # warnings must still reach the build's own warning filters.
+    from retrofy import _converters
+    from retrofy._transformations.lazy_imports import LazyModulesIgnoredWarning
+
+    monkeypatch.setattr(_converters, "_MIN_PARALLEL_SOURCES", 2)
+    monkeypatch.setattr(_converters.os, "cpu_count", lambda: 2)
+    (tmp_path / "pyproject.toml").write_text(
+        _opt_in_pyproject(
+            """\
+            [project]
+            name = "dummypkg"
+            [tool.retrofy]
+            target-python = "3.9"
+            """,
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.chdir(tmp_path)
+    files = {f"dummypkg/m{i}.py": "x: list[int] = []\n" for i in range(4)}
+    files["dummypkg/__init__.py"] = ""
+    files["dummypkg/x.py"] = (
+        '__lazy_modules__ = ["json"]\nlazy from foo import bar\n'
+    )
+    sdist = _make_minimal_sdist(tmp_path, files)
+
+    with pytest.warns(LazyModulesIgnoredWarning):
+        lower_sdist(sdist)
+
+    files = _read_sdist(sdist)
+    assert "__lazy_from__" in files["dummypkg/x.py"].decode("utf-8")
+    assert "List[int]" in files["dummypkg/m0.py"].decode("utf-8")
+
+
 def test_lower_sdist_injects_runtime_payload(tmp_path, monkeypatch):
     (tmp_path / "pyproject.toml").write_text(
         _opt_in_pyproject(